@@ -27,4 +27,9 @@ def create_app(config_class=Config):
     app.register_blueprint(api_bp, url_prefix='/api')
     # --------------------------------
 
+    # Seating jobs left active by a process that is gone (no recent heartbeat)
+    from app.services.seating_jobs import fail_interrupted_jobs
+    with app.app_context():
+        fail_interrupted_jobs()
+
     return app
\ No newline at end of file
@@ -1,15 +1,27 @@
 import os
 import csv
 import io
-from datetime import datetime, timedelta
+import json
+import sys
+import time
+import threading
+from datetime import date, datetime, timedelta
 from itertools import groupby
+try:
+    import resource  # Unix only
+except ImportError:
+    resource = None
 
-from flask import Blueprint, request, jsonify, current_app, render_template
-from sqlalchemy import func 
+from flask import Blueprint, Response, request, jsonify, current_app, render_template, stream_with_context
+from sqlalchemy import case, func
 from app import db
-from app.models import Student, Admin, Room, Exam, SeatAssignment, Teacher, Invigilation
-from app.services.ai_engine import ai_engine
-from app.services.seating_algo import generate_multi_branch_seating
+from app.models import Student, Admin, Room, Exam, SeatAssignment, Teacher, Invigilation, SeatingJob
+from app.services.ai_engine import ALL_UPCOMING, ai_engine
+from app.services.seating_algo import compile_layout_bitmap, commit_seating_plan, force_requested, inputs_fingerprint, load_seating_inputs, plan_exam_seating, plan_summary, plan_timetable, reseat_incremental, seating_report, stored_plan_size
+from app.services.seating_preview import PREVIEW_TTL, discard_preview, load_preview, save_preview
+from app.services.seating_jobs import fail_interrupted_jobs, job_is_stale, job_progress, submit_seating_job
+from app.services.report_export import EXPORT_FORMATS, EXPORT_REPORTS, export_cache_dir, export_zip
+from app.services.report_cache import cached_report, local_bump_count, seating_version
 from app.models import SeatAssignment, Student, Room, Exam  # Ensure these are imported at the top
 
 api_bp = Blueprint('api', __name__)
@@ -68,52 +80,224 @@ def login():
         return jsonify({"message": "Welcome!", "redirect_url": "/dashboard/admin"}), 200
     return jsonify({"error": "Invalid Credentials"}), 401
 
-def perform_training():
-    assignments = SeatAssignment.query.all()
-    if not assignments: return 0 
-    real_data = []
-    for seat in assignments:
-        if seat.student and seat.room:
-            real_data.append({
-                'registration_number': seat.student.registration_number,
-                'roll_number': seat.student.roll_number, 
-                'seat': seat.seat_label,
-                'room': seat.room.name, 'building': seat.room.building
-            })
-    if real_data: ai_engine.train(real_data); return len(real_data)
-    return 0
+TRAINING_CHUNK_SIZE = 2000
+
+def iter_training_rows(chunk_size=TRAINING_CHUNK_SIZE):
+    """
+    One joined, column-only query over the seating table.
+    Rows are streamed from the cursor in chunks instead of building the ORM graph.
+    Only exams from today onwards are indexed, ordered so each exam arrives as
+    one contiguous group (one shard).
+    """
+    query = (db.session.query(SeatAssignment.exam_id, Exam.date, SeatAssignment.student_id,
+                              Student.registration_number, Student.roll_number, Student.name,
+                              SeatAssignment.seat_label, Room.name, Room.building)
+             .join(Exam, SeatAssignment.exam_id == Exam.id)
+             .join(Student, SeatAssignment.student_id == Student.id)
+             .join(Room, SeatAssignment.room_id == Room.id)
+             .filter(Exam.date >= date.today())
+             .order_by(Exam.date, Exam.id)
+             .yield_per(chunk_size))
+    for exam_id, exam_date, student_id, reg_no, roll_no, name, seat_label, room_name, building in query:
+        yield {
+            'exam_id': exam_id, 'exam_date': exam_date,
+            'student_id': student_id,
+            'registration_number': reg_no,
+            'roll_number': roll_no,
+            'name': name,
+            'seat': seat_label,
+            'room': room_name, 'building': building
+        }
+
+def seating_data_version():
+    """
+    Version of the data the AI index is built from: the seating version token,
+    which every committed write to seats, students, rooms or exams moves on.
+    """
+    # The day is part of the version so yesterday's exams drop out of the index
+    return f"{seating_version()}|day:{date.today()}"
+
+# Single-flight: concurrent requests that need a rebuild wait for one build
+_training_lock = threading.Lock()
+_last_version_check = 0.0
+_last_local_bumps = None
+VERSION_CHECK_INTERVAL = 5  # seconds between data-version probes (other workers' writes)
+
+def ensure_ai_ready():
+    """
+    Cold start: map the shared on-disk snapshot if it matches the data, else train.
+    Afterwards the data version is probed at most every VERSION_CHECK_INTERVAL
+    (at once after a write in this worker) and the index rebuilt if it moved.
+    Returns True if the index was (re)loaded.
+    """
+    global _last_version_check, _last_local_bumps
+    if ai_engine.is_trained and _last_local_bumps == local_bump_count() \
+            and time.monotonic() - _last_version_check < VERSION_CHECK_INTERVAL:
+        return False
+
+    with _training_lock:
+        _last_version_check, _last_local_bumps = time.monotonic(), local_bump_count()
+        version = seating_data_version()
+        # Another request may have rebuilt it while we waited for the lock
+        if ai_engine.is_trained and ai_engine.data_version == version: return False
+        if ai_engine.load(current_app.config['AI_INDEX_DIR'], version): return True
+        perform_training(version)
+        return True
+
+def peak_rss_mb():
+    """Process high-water RSS in MB, or None where getrusage is missing (Windows). Free to read, unlike tracemalloc."""
+    if resource is None: return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, KB on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def perform_training(version=None):
+    """
+    Rebuilds the AI index and publishes its snapshot.
+    Returns stats: records, elapsed_ms, peak_mb, peak_growth_mb (both None where unmeasurable).
+    """
+    peak_before = peak_rss_mb()
+    started = time.perf_counter()
+    if version is None: version = seating_data_version()
+    count = ai_engine.train(iter_training_rows(), version)
+    if ai_engine.is_trained:
+        ai_engine.save(current_app.config['AI_INDEX_DIR'])
+    peak = peak_rss_mb()
+    stats = {
+        'records': count,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+        'peak_mb': round(peak, 2) if peak is not None else None,
+        # How far this build raised the process peak
+        'peak_growth_mb': round(peak - peak_before, 2) if peak is not None else None
+    }
+    print(f"AI training stats: {stats}")
+    return stats
 
 @api_bp.route('/admin/train-ai', methods=['GET']) 
 def train_ai_model():
-    count = perform_training()
-    return jsonify({"message": f"✅ AI learned {count} locations."})
+    with _training_lock:
+        stats = perform_training()
+    peak = f" (peak {stats['peak_mb']} MB)" if stats['peak_mb'] is not None else ""
+    return jsonify({
+        "message": f"✅ AI learned {stats['records']} locations in {stats['elapsed_ms']} ms{peak}.",
+        "stats": stats
+    })
+
+MAX_BATCH_LOOKUP = 500
+MAX_SUGGESTIONS = 5
+
+def parse_lookup_scope(source):
+    """
+    Optional exam_id / date (YYYY-MM-DD) narrowing a lookup to those exam shards.
+    Without either, the next exam date is searched; date=upcoming searches every exam from today.
+    Returns (exam_id, exam_date, error).
+    """
+    exam_id, exam_date = source.get('exam_id'), source.get('date')
+    try:
+        exam_id = int(exam_id) if exam_id not in (None, '') else None
+        if exam_date and str(exam_date).lower() == ALL_UPCOMING:
+            exam_date = ALL_UPCOMING
+        else:
+            exam_date = datetime.strptime(str(exam_date), '%Y-%m-%d').date().isoformat() if exam_date else None
+    except ValueError:
+        return None, None, f"Invalid exam_id or date (use YYYY-MM-DD or {ALL_UPCOMING})"
+    return exam_id, exam_date, None
+
+def parse_suggest(source):
+    """Optional suggest=k: near-miss candidates to return on a fuzzy no_match (capped)."""
+    try:
+        return min(max(int(source.get('suggest') or 0), 0), MAX_SUGGESTIONS)
+    except (TypeError, ValueError):
+        return 0
+
+def attach_student_details(results):
+    """
+    Adds student_info / exam / layout to successful lookups.
+    Two bulk queries for the whole list instead of two per result.
+    """
+    hits = [r for r in results if r.get('status') == 'success']
+    if not hits: return results
+
+    student_ids = {r['student_id'] for r in hits}
+    students = {s.id: s for s in Student.query.filter(Student.id.in_(student_ids)).all()}
+    seats = (db.session.query(SeatAssignment, Exam, Room)
+             .join(Exam, SeatAssignment.exam_id == Exam.id)
+             .join(Room, SeatAssignment.room_id == Room.id)
+             .filter(SeatAssignment.student_id.in_(student_ids),
+                     SeatAssignment.exam_id.in_({r['exam_id'] for r in hits}))
+             .all())
+    seat_by_key = {(seat.student_id, seat.exam_id): (seat, exam, room) for seat, exam, room in seats}
+
+    for result in hits:
+        student = students.get(result.pop('student_id'))
+        if not student: continue
+        result['student_info'] = {'name': student.name, 'branch': student.branch, 'pic': student.profile_image}
+        if (student.id, result.get('exam_id')) in seat_by_key:
+            seat, exam, room = seat_by_key[(student.id, result['exam_id'])]
+            result['seat_details']['exam_name'] = exam.name
+            result['seat_details']['exam_date'] = exam.date.strftime('%d-%b-%Y')
+            result['seat_details']['exam_time'] = exam.time_slot
+            result['layout'] = {'total_rows': room.total_rows, 'total_cols': room.total_columns, 'my_row': seat.row_num, 'my_col': seat.col_num}
+    return results
 
 @api_bp.route('/seat-lookup', methods=['GET'])
 def lookup_seat():
     query = request.args.get('query')
     if not query: return jsonify({"error": "Query required"}), 400
-    if not ai_engine.is_trained: perform_training()
-    result = ai_engine.find_seat(query)
-    
-    # Auto-recovery
+    exam_id, exam_date, error = parse_lookup_scope(request.args)
+    if error: return jsonify({"error": error}), 400
+    suggest = parse_suggest(request.args)
+    scope = (exam_id, exam_date, suggest)
+
+    ensure_ai_ready()
+    cached = ai_engine.cached_miss(query, scope)
+    if cached: return jsonify(cached)
+    result = ai_engine.find_seat(query, exam_id, exam_date, suggest)
     if result.get('status') != 'success':
-        perform_training()
-        result = ai_engine.find_seat(query)
-        
-    if result.get('status') == 'success':
-        sid = result['match_found']
-        student = Student.query.filter((Student.registration_number == sid) | (Student.roll_number == sid)).first()
-        if student:
-            result['student_info'] = {'name': student.name, 'branch': student.branch, 'pic': student.profile_image}
-            seat = SeatAssignment.query.filter_by(student_id=student.id).first()
-            if seat:
-                result['seat_details']['exam_name'] = seat.exam.name
-                result['seat_details']['exam_date'] = seat.exam.date.strftime('%d-%b-%Y')
-                result['seat_details']['exam_time'] = seat.exam.time_slot
-                if seat.room:
-                    result['layout'] = {'total_rows': seat.room.total_rows, 'total_cols': seat.room.total_columns, 'my_row': seat.row_num, 'my_col': seat.col_num}
+        ai_engine.remember_miss(query, result, scope)
+
+    attach_student_details([result])
     return jsonify(result)
 
+@api_bp.route('/seat-lookup/batch', methods=['POST'])
+def lookup_seat_batch():
+    data = request.json or {}
+    queries = data.get('queries')
+    if not isinstance(queries, list) or not queries:
+        return jsonify({"error": "queries (list) required"}), 400
+    if len(queries) > MAX_BATCH_LOOKUP:
+        return jsonify({"error": f"At most {MAX_BATCH_LOOKUP} queries per batch"}), 400
+    exam_id, exam_date, error = parse_lookup_scope(data)
+    if error: return jsonify({"error": error}), 400
+    suggest = parse_suggest(data)
+    scope = (exam_id, exam_date, suggest)
+
+    ensure_ai_ready()
+    cleaned = [str(q).strip() if q is not None else '' for q in queries]
+    results = [{"status": "error", "message": "Empty query"} for _ in cleaned]
+    pending = []
+    for i, q in enumerate(cleaned):
+        if not q: continue
+        cached = ai_engine.cached_miss(q, scope)
+        if cached: results[i] = cached
+        else: pending.append(i)
+
+    for i, result in zip(pending, ai_engine.find_seats([cleaned[i] for i in pending], exam_id, exam_date, suggest)):
+        results[i] = result
+
+    for i in pending:
+        if results[i].get('status') != 'success':
+            ai_engine.remember_miss(cleaned[i], results[i], scope)
+    attach_student_details(results)
+    for query, result in zip(queries, results):
+        result['query'] = query
+
+    return jsonify({
+        "count": len(results),
+        "matched": sum(1 for r in results if r.get('status') == 'success'),
+        "results": results
+    })
+
 # ==========================================
 # 3. ADMIN FEATURES (ROOMS & STATS)
 # ==========================================
@@ -128,8 +312,12 @@ def add_room():
     data = request.json
     try:
         matrix = data.get('layout_matrix', '')
-        cap = matrix.count('1') if matrix else (int(data['rows']) * int(data['cols']))
-        new_room = Room(name=data['name'], building=data.get('building', 'Main'), total_rows=int(data['rows']), total_columns=int(data['cols']), capacity=cap, layout_matrix=matrix)
+        rows, cols = int(data['rows']), int(data['cols'])
+        if matrix and len(matrix.split(',')) != rows * cols:
+            return jsonify({"error": f"layout_matrix needs {rows * cols} cells"}), 400
+        cap = matrix.count('1') if matrix else (rows * cols)
+        new_room = Room(name=data['name'], building=data.get('building', 'Main'), total_rows=rows, total_columns=cols, capacity=cap, layout_matrix=matrix,
+                        layout_bitmap=compile_layout_bitmap(rows, cols, matrix))
         db.session.add(new_room); db.session.commit()
         return jsonify({"message": "Room created!"})
     except Exception as e: return jsonify({"error": str(e)}), 500
@@ -141,6 +329,10 @@ def update_room():
     if not room: return jsonify({"error": "Room not found"}), 404
     room.total_rows = int(data['rows']); room.total_columns = int(data['cols'])
     room.capacity = room.total_rows * room.total_columns
+    # A resized room's old layout no longer lines up with its cells: all seats exist
+    if room.layout_matrix and len(room.layout_matrix.split(',')) != room.capacity:
+        room.layout_matrix = None
+    room.layout_bitmap = compile_layout_bitmap(room.total_rows, room.total_columns, room.layout_matrix)
     db.session.commit()
     return jsonify({"status": "success", "message": "Updated!"})
 
@@ -227,122 +419,187 @@ def bulk_upload_students():
 @api_bp.route('/admin/generate-seating', methods=['POST'])
 def run_seating_algo():
     data = request.json
-    
-    # ... (Keep existing code for fetching branch_names, target_session, and all_students_pool) ...
-    if data['branches'].strip().upper() == 'ALL':
-        unique_branches = db.session.query(Student.branch).distinct().all()
-        branch_names = [b[0] for b in unique_branches] 
-    else:
-        branch_names = [b.strip() for b in data['branches'].split(',')]
-
-    target_session = data.get('target_session', '').strip()
-
-    all_students_pool = []
-    for branch in branch_names:
-        query = Student.query.filter_by(branch=branch)
-        if target_session:
-            query = query.filter_by(session=target_session)
-        students = query.all()
-        if students:
-            all_students_pool.extend(students)
-    
-    if not all_students_pool:
-        return jsonify({"success": False, "error": "No students found."})
-
-    # Strict Sort by Roll Number
-    all_students_pool.sort(key=lambda s: (s.branch, s.roll_number))
-
     try:
-        # ... (Keep existing Exam creation/lookup logic) ...
-        exam_date = datetime.strptime(data['date'], '%Y-%m-%d').date()
-        raw_name = data['exam_name']
-        sem = data.get('semester', '')
-        final_exam_name = f"{raw_name} - {sem}" if sem else raw_name
-        
-        exam = Exam.query.filter_by(name=final_exam_name, date=exam_date, time_slot=data['time']).first()
-        if not exam:
-            exam = Exam(name=final_exam_name, subject_code="MIXED", date=exam_date, time_slot=data['time'])
-            db.session.add(exam); db.session.commit()
-
-        SeatAssignment.query.filter_by(exam_id=exam.id).delete()
-        db.session.commit()
+        exam, rooms, students, max_branches, error = load_seating_inputs(data)
+        if error: return jsonify({"success": False, "error": error})
+
+        # Same inputs as the stored plan: nothing to rewrite (force=true re-plans anyway)
+        plan_hash = inputs_fingerprint(rooms, students, max_branches)
+        stored = stored_plan_size(exam, plan_hash, force_requested(data))
+        if stored is not None:
+            return jsonify({
+                "success": True,
+                "allocated": stored,
+                "unchanged": True,
+                "message": f"Seating unchanged: {stored} students already allocated from the same inputs. "
+                           f"{len(students) - stored} remaining."
+            })
 
-        total_allocated = 0
-        if str(data['room_id']).lower() == 'all':
-            target_rooms = Room.query.order_by(Room.capacity.desc()).all()
-        else:
-            target_rooms = [Room.query.get(int(data['room_id']))]
+        # Whole plan in memory (rooms picked by select_rooms), then written in one transaction
+        assignments, per_room = plan_exam_seating(rooms, students, max_branches)
+        total_allocated = commit_seating_plan(exam.id, assignments, plan_hash)
+        report = seating_report(rooms, per_room)
 
-        if not target_rooms: return jsonify({"success": False, "error": "No rooms found."})
+        return jsonify({
+            "success": True, 
+            "allocated": total_allocated, 
+            "rooms_used": report["rooms_used"],
+            "leftover_seats": report["leftover_seats"],
+            "message": f"Allocated {total_allocated} students in {len(report['rooms_used'])} rooms "
+                       f"({report['leftover_seats']} seats left empty). {len(students) - total_allocated} remaining."
+        })
 
-        # --- NEW LOGIC STARTS HERE ---
-        
-        # 1. Get the limit (0 means no limit)
-        max_branches = int(data.get('max_branches', 0))
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"success": False, "error": str(e)})
 
-        global_seated_ids = set()
+@api_bp.route('/admin/generate-seating/incremental', methods=['POST'])
+def run_incremental_seating():
+    """
+    Same body as /admin/generate-seating, for an exam that is already seated:
+    seats only students not yet placed and frees only withdrawn ones.
+    """
+    data = request.json
+    try:
+        result, error = reseat_incremental(data)
+        if error: return jsonify({"success": False, "error": error})
+        return jsonify({
+            "success": True, **result,
+            "message": f"Added {result['added']}, removed {result['removed']}, kept {result['kept']}. "
+                       f"{result['unplaced']} could not be placed."
+        })
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"success": False, "error": str(e)})
 
-        for room in target_rooms:
-            # Filter pool: Remove students already seated
-            current_pool = [s for s in all_students_pool if s.id not in global_seated_ids]
-            if not current_pool: break 
+@api_bp.route('/admin/generate-seating/preview', methods=['POST'])
+def preview_seating():
+    """
+    Dry run: same body as /admin/generate-seating, full planner, no database
+    writes. Returns the plan summary and a token for /admin/generate-seating/commit.
+    """
+    data = request.json
+    try:
+        exam, rooms, students, max_branches, error = load_seating_inputs(data, create_exam=False)
+        if error: return jsonify({"success": False, "error": error})
+
+        assignments, _ = plan_exam_seating(rooms, students, max_branches)
+        plan_hash = inputs_fingerprint(rooms, students, max_branches)
+        token = save_preview(current_app.config['SEATING_PREVIEW_DIR'], data, plan_hash, assignments)
+        return jsonify({"success": True, "token": token, "expires_in": PREVIEW_TTL,
+                        "exam_id": exam.id if exam else None,
+                        "unchanged": bool(exam and exam.plan_hash == plan_hash),
+                        **plan_summary(rooms, students, assignments)})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"success": False, "error": str(e)})
 
-            grouped_data = {}
-            for s in current_pool:
-                if s.branch not in grouped_data: grouped_data[s.branch] = []
-                grouped_data[s.branch].append(s)
-            
-            # 2. APPLY THE LIMIT PER ROOM
-            active_branches = list(grouped_data.keys())
-            
-            # If a limit is set, take only the first N branches available
-            if max_branches > 0 and len(active_branches) > max_branches:
-                selected_branches = active_branches[:max_branches]
-                
-                # Re-filter the pool for this room ONLY to these branches
-                room_specific_pool = []
-                for b in selected_branches:
-                    room_specific_pool.extend(grouped_data[b])
-                
-                # Pass only the limited pool to the allocation function
-                students_to_seat = room_specific_pool
-            else:
-                # No limit or branches are within limit -> use everyone available
-                students_to_seat = current_pool
-
-            # 3. Pass 'students_to_seat' instead of 'grouped_data.values()' directly
-            # We need to regroup them for the function call
-            final_groups = {}
-            for s in students_to_seat:
-                if s.branch not in final_groups: final_groups[s.branch] = []
-                final_groups[s.branch].append(s)
-
-            result = generate_multi_branch_seating(exam.id, room.id, list(final_groups.values()))
-            
-            if "allocated" in result and result["allocated"] > 0:
-                total_allocated += result["allocated"]
-                
-                db.session.commit()
-                # Important: Don't expire all here to keep local objects valid if possible, 
-                # but expire_all is safer for data consistency.
-                
-                # Fetch IDs of students just seated to exclude them from next room
-                just_seated = SeatAssignment.query.filter_by(exam_id=exam.id, room_id=room.id).all()
-                for seat in just_seated:
-                    global_seated_ids.add(seat.student_id)
-            else:
-                print(f"Room {room.name}: Full or Error - {result.get('error')}")
+@api_bp.route('/admin/generate-seating/commit', methods=['POST'])
+def commit_seating_preview():
+    """Persists a preview exactly as previewed (no re-planning), if its inputs are unchanged."""
+    token = (request.json or {}).get('token')
+    directory = current_app.config['SEATING_PREVIEW_DIR']
+    preview = load_preview(directory, token)
+    if not preview: return jsonify({"success": False, "error": "Preview not found or expired"}), 404
 
+    try:
+        exam, rooms, students, max_branches, error = load_seating_inputs(preview['request'])
+        if not error and inputs_fingerprint(rooms, students, max_branches) != preview['fingerprint']:
+            error = "Students or rooms changed since this preview. Run the preview again."
+        if error:
+            db.session.rollback()
+            return jsonify({"success": False, "error": error}), 409
+
+        allocated = commit_seating_plan(exam.id, preview['assignments'], preview['fingerprint'])
+        discard_preview(directory, token)
         return jsonify({
-            "success": True, 
-            "allocated": total_allocated, 
-            "message": f"Allocated {total_allocated} students. {len(all_students_pool) - len(global_seated_ids)} remaining."
+            "success": True,
+            "exam_id": exam.id,
+            "allocated": allocated,
+            "message": f"Allocated {allocated} students. {len(students) - allocated} remaining."
         })
-
     except Exception as e:
         db.session.rollback()
         return jsonify({"success": False, "error": str(e)})
 
+@api_bp.route('/admin/seating-jobs', methods=['POST'])
+def submit_seating():
+    """Same body as /admin/generate-seating; returns at once with a job id to poll."""
+    data = request.json or {}
+    missing = [k for k in ('branches', 'exam_name', 'date', 'time', 'room_id') if not data.get(k)]
+    if missing: return jsonify({"success": False, "error": f"Missing: {', '.join(missing)}"}), 400
+    job = submit_seating_job(current_app._get_current_object(), data)
+    return jsonify({"success": True, "job_id": job.id, "status": job.status}), 202
+
+@api_bp.route('/admin/seating-jobs/<job_id>', methods=['GET'])
+def seating_job_status(job_id):
+    job = SeatingJob.query.get(job_id)
+    if not job: return jsonify({"error": "Job not found"}), 404
+    if job_is_stale(job):
+        fail_interrupted_jobs()
+        db.session.refresh(job)
+    return jsonify(job_progress(job))
+
+@api_bp.route('/admin/generate-seating/timetable', methods=['POST'])
+def run_timetable_seating():
+    """
+    Seats a whole timetable: {"exams": [<generate-seating body>, ...]}.
+    Each date is planned in its own worker process (dates share no rooms);
+    each exam is committed on its own as soon as its date is planned.
+    """
+    data = request.json or {}
+    slots = data.get('exams')
+    if not isinstance(slots, list) or not slots:
+        return jsonify({"success": False, "error": "exams (list) required"}), 400
+
+    started = time.perf_counter()
+    results = [None] * len(slots)
+    exams, days = {}, {}
+    for i, slot in enumerate(slots):
+        try:
+            exam, rooms, students, max_branches, error = load_seating_inputs(slot)
+        except (KeyError, ValueError, AttributeError) as e:
+            error = f"Invalid exam entry: {e}"
+        if error:
+            results[i] = {"success": False, "error": error}
+            continue
+        # Same name, date and time resolve to one exam: a second plan would replace the first one's seats
+        first = next((n for n, (exam_id, _) in exams.items() if exam_id == exam.id), None)
+        if first is not None:
+            results[i] = {"success": False, "exam_id": exam.id,
+                          "error": f"Duplicate of exam entry {first + 1} (same exam name, date and time)"}
+            continue
+        exams[i] = (exam.id, len(students))
+        days.setdefault(exam.date, []).append((i, exam.time_slot, rooms, students, max_branches))
+    db.session.commit()  # New exams keep their ids even if a later slot fails
+
+    try:
+        for day, planned in plan_timetable(days):
+            for i, assignments, error in planned:
+                exam_id, pool_size = exams[i]
+                if error:
+                    results[i] = {"success": False, "exam_id": exam_id, "error": error}
+                    continue
+                try:
+                    allocated = commit_seating_plan(exam_id, assignments)
+                    results[i] = {"success": True, "exam_id": exam_id, "date": str(day), "allocated": allocated,
+                                  "message": f"Allocated {allocated} students. {pool_size - allocated} remaining."}
+                except Exception as e:
+                    db.session.rollback()
+                    results[i] = {"success": False, "exam_id": exam_id, "error": str(e)}
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Timetable seating failed: {e}")
+        for i in exams:
+            if results[i] is None: results[i] = {"success": False, "exam_id": exams[i][0], "error": str(e)}
+
+    return jsonify({
+        "success": all(r["success"] for r in results),
+        "allocated": sum(r.get("allocated", 0) for r in results),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        "results": results
+    })
+
 @api_bp.route('/admin/get-exams-in-room/<int:room_id>', methods=['GET'])
 def get_exams_in_room(room_id):
     if room_id == 0:
@@ -362,6 +619,7 @@ def get_exams_in_room(room_id):
     return jsonify(exams_data)
 
 @api_bp.route('/admin/get-seating-chart/<int:room_id>', methods=['GET'])
+@cached_report
 def get_seating_chart(room_id):
     exam_id = request.args.get('exam_id')
     
@@ -400,8 +658,11 @@ def reset_seating():
         
         # 2. Delete Invigilations (Child of Exam)
         db.session.query(Invigilation).delete()
+
+        # 3. Delete Seating Jobs (they point at their Exam)
+        db.session.query(SeatingJob).delete()
         
-        # 3. Now it is safe to delete Exams (Parent)
+        # 4. Now it is safe to delete Exams (Parent)
         db.session.query(Exam).delete()
         
         db.session.commit()
@@ -416,6 +677,7 @@ def reset_database():
     try:
         # Delete operational data only, KEEP ADMINS
         SeatAssignment.query.delete()
+        SeatingJob.query.delete()
         Invigilation.query.delete()
         Student.query.delete()
         Teacher.query.delete()
@@ -425,8 +687,7 @@ def reset_database():
         db.session.commit()
         
         # Clear AI
-        ai_engine.is_trained = False
-        ai_engine.search_tokens = []
+        ai_engine.reset()
         
         return jsonify({"message": "System Reset Successful. All operational data wiped."})
     except Exception as e:
@@ -593,7 +854,61 @@ def delete_duty():
 # 8. REPORTS (NOTICE BOARD / ATTENDANCE / MASTER)
 # ==========================================
 
+def notice_board_halls(filters, id_type='roll', room_id=None):
+    """
+    Notice board rows for the exams matching filters, one grouped query:
+    [{hall_no, room_total, branches: [{name, start, end, count, contiguous}]}]
+    in hall order. start/end are the first and last ID (roll or reg) per branch.
+    """
+    # Students ordered by the chosen ID (numeric for reg numbers)
+    if id_type == 'reg':
+        id_value, student_order = Student.registration_number, (Student.sort_key, Student.registration_number)
+    else:
+        id_value, student_order = Student.roll_number, (Student.roll_number,)
+    bucket = (SeatAssignment.room_id, Student.branch)
+
+    # Per seat: position in its room x branch bucket (both ends) and in the whole branch.
+    # The room filter comes after this, so a gap caused by another hall still shows.
+    seats = (db.session.query(
+                SeatAssignment.room_id, Student.branch, id_value.label('id_value'),
+                func.row_number().over(partition_by=bucket, order_by=student_order).label('room_pos'),
+                func.row_number().over(partition_by=bucket, order_by=[c.desc() for c in student_order]).label('room_pos_desc'),
+                func.row_number().over(partition_by=Student.branch, order_by=student_order).label('branch_pos'))
+             .select_from(SeatAssignment)
+             .join(Exam, SeatAssignment.exam_id == Exam.id)
+             .join(Student, SeatAssignment.student_id == Student.id)
+             .filter(*filters)
+             .subquery())
+
+    # One row per room x branch: count, first/last ID, and whether the bucket is
+    # one unbroken run of the branch (no one in between sits elsewhere)
+    count = func.count()
+    query = (db.session.query(
+                Room.id, Room.building, Room.name, seats.c.branch, count,
+                func.max(case((seats.c.room_pos == 1, seats.c.id_value))),
+                func.max(case((seats.c.room_pos_desc == 1, seats.c.id_value))),
+                func.max(seats.c.branch_pos) - func.min(seats.c.branch_pos) + 1 == count)
+             .join(Room, Room.id == seats.c.room_id)
+             .group_by(Room.id, Room.building, Room.name, seats.c.branch))
+
+    if room_id and room_id != 'all': 
+        query = query.filter(seats.c.room_id == int(room_id))
+
+    halls = []
+    for (_, building, room_name), rows in groupby(query.order_by(Room.building, Room.name, Room.id, seats.c.branch),
+                                                  key=lambda x: x[:3]):
+        rows = list(rows)
+        halls.append({
+            "hall_no": f"{building} - {room_name}",
+            "room_total": sum(r[4] for r in rows),
+            "branches": [{"name": branch, "start": start_val or 'N/A', "end": end_val or 'N/A', "count": n,
+                          "contiguous": bool(contiguous)}
+                         for _, _, _, branch, n, start_val, end_val, contiguous in rows]
+        })
+    return halls
+
 @api_bp.route('/admin/notice-board-data', methods=['GET'])
+@cached_report
 def get_notice_board_data():
     # Gather inputs
     exam_id = request.args.get('exam_id')
@@ -605,11 +920,9 @@ def get_notice_board_data():
     id_type = request.args.get('id_type', 'roll')
 
     try:
-        query = db.session.query(SeatAssignment).join(Exam).join(Student).join(Room)
-
         # LOGIC CHANGE: Prefer specific Exam ID if provided
         if exam_id:
-            query = query.filter(Exam.id == int(exam_id))
+            filters = [Exam.id == int(exam_id)]
             # Fetch exam details for the header
             exam_obj = Exam.query.get(int(exam_id))
             exam_title = exam_obj.name
@@ -618,10 +931,9 @@ def get_notice_board_data():
             
             # Try to infer batch from the first student if not provided
             if not batch:
-                sample_student = query.first()
-                if sample_student:
-                    # --- FIX IS HERE: Use .student (lowercase) ---
-                    batch = sample_student.student.session
+                sample = (db.session.query(Student.session).join(SeatAssignment, SeatAssignment.student_id == Student.id)
+                          .filter(SeatAssignment.exam_id == int(exam_id)).first())
+                if sample: batch = sample[0]
         else:
             # Fallback to old Date/Time logic
             if not date_str or not time: 
@@ -631,45 +943,19 @@ def get_notice_board_data():
             exam_time = time
             exam_title = "Semester Examination" # Generic fallback
             
-            query = query.filter(Exam.date == exam_date, Exam.time_slot == time)
-            if batch: query = query.filter(Student.session == batch.strip())
+            filters = [Exam.date == exam_date, Exam.time_slot == time]
+            if batch: filters.append(Student.session == batch.strip())
 
-        # Common Filters
-        if room_id and room_id != 'all': 
-            query = query.filter(SeatAssignment.room_id == int(room_id))
-        
-        # Sort by Room then Branch
-        assignments = query.order_by(Room.building, Room.name, Room.id, Student.branch).all()
+        halls = notice_board_halls(filters, id_type, room_id)
 
-        if not assignments: return jsonify({"error": "No data found."}), 404
+        if not halls: return jsonify({"error": "No data found."}), 404
 
-        # --- DATA PROCESSING (Grouping) ---
-        report_data = []
-        for room, r_seats in groupby(assignments, key=lambda x: x.room):
-            seats_list = list(r_seats)
-            room_entry = {"hall_no": f"{room.building} - {room.name}", "branches": [], "room_total": len(seats_list)}
-
-            # Group by branch
-            seats_list.sort(key=lambda x: x.student.branch)
-            for branch, b_seats in groupby(seats_list, key=lambda x: x.student.branch):
-                students = [s.student for s in b_seats]
-                
-                # Sort & Range Calculation
-                if id_type == 'reg':
-                    students.sort(key=lambda s: s.registration_number if s.registration_number else "ZZZZ")
-                    start_val = students[0].registration_number or "N/A"
-                    end_val = students[-1].registration_number or "N/A"
-                else:
-                    students.sort(key=lambda s: s.roll_number)
-                    start_val = students[0].roll_number
-                    end_val = students[-1].roll_number
-
-                room_entry["branches"].append({
-                    "name": branch,
-                    "range": f"{start_val} To {end_val}",
-                    "count": len(students)
-                })
-            report_data.append(room_entry)
+        report_data = [{
+            "hall_no": hall["hall_no"],
+            "branches": [{"name": b["name"], "range": f"{b['start']} To {b['end']}", "count": b["count"],
+                          "contiguous": b["contiguous"]} for b in hall["branches"]],
+            "room_total": hall["room_total"]
+        } for hall in halls]
 
         return jsonify({
             "status": "success",
@@ -688,7 +974,22 @@ def get_notice_board_data():
     
 # --- REPLACE existing 'get_attendance_sheet_data' with this IMPROVED version --
 
+def room_branch_counts(*filters):
+    """
+    Seats per (room, branch) for the exams matching filters, counted by the DB:
+    rows are (room_id, building, room_name, branch, count), one per room x branch,
+    so report cost does not grow with the number of students.
+    """
+    return (db.session.query(Room.id, Room.building, Room.name, Student.branch, func.count(SeatAssignment.id))
+            .select_from(SeatAssignment)
+            .join(Exam, SeatAssignment.exam_id == Exam.id)
+            .join(Room, SeatAssignment.room_id == Room.id)
+            .join(Student, SeatAssignment.student_id == Student.id)
+            .filter(*filters)
+            .group_by(Room.id, Room.building, Room.name, Student.branch))
+
 @api_bp.route('/admin/question-distribution', methods=['GET'])
+@cached_report
 def get_question_distribution():
     exam_id = request.args.get('exam_id')  # <--- NEW
     date_str = request.args.get('date')
@@ -699,14 +1000,9 @@ def get_question_distribution():
         return jsonify({"error": "Exam Selection required"}), 400
 
     try:
-        query = (db.session.query(SeatAssignment)
-                 .join(Exam)
-                 .join(Student)
-                 .join(Room))
-
         # LOGIC CHANGE: Prefer Exam ID
         if exam_id:
-            query = query.filter(Exam.id == int(exam_id))
+            filters = [Exam.id == int(exam_id)]
             # Fetch exam details for header
             exam_obj = Exam.query.get(int(exam_id))
             exam_name = exam_obj.name
@@ -715,26 +1011,22 @@ def get_question_distribution():
         else:
             # Fallback
             exam_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-            query = query.filter(Exam.date == exam_date, Exam.time_slot.ilike(f"%{time.strip()}%"))
+            filters = [Exam.date == exam_date, Exam.time_slot.ilike(f"%{time.strip()}%")]
             exam_name = "Semester Examination" # Generic
             exam_time = time
 
-        assignments = query.order_by(Student.branch, Room.name).all()
+        # Counts only: one row per branch x room
+        counts = room_branch_counts(*filters).order_by(Student.branch, Room.name, Room.id).all()
 
-        if not assignments:
+        if not counts:
             return jsonify({"error": "No seating found."}), 404
 
-        # ... (Keep existing grouping logic) ...
         distribution_data = []
-        for branch, branch_seats in groupby(assignments, key=lambda x: x.student.branch):
-            branch_seats_list = list(branch_seats)
+        for branch, rows in groupby(counts, key=lambda x: x[3]):
             room_breakdown = []
             total_students = 0
-            
-            branch_seats_list.sort(key=lambda x: x.room.name)
-            for room, room_seats in groupby(branch_seats_list, key=lambda x: x.room):
-                count = len(list(room_seats))
-                room_breakdown.append(f"{room.name} = {count}")
+            for _, _, room_name, _, count in rows:
+                room_breakdown.append(f"{room_name} = {count}")
                 total_students += count
             
             distribution_data.append({
@@ -756,7 +1048,16 @@ def get_question_distribution():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def master_chart_halls(filters):
+    """Master chart rows (counts only, one row per room x branch): ([{hall_no, branches: [{name, count}]}], grand total)."""
+    counts = room_branch_counts(*filters).order_by(Room.building, Room.name, Room.id, Student.branch).all()
+    halls = [{"hall_no": f"{building} - {room_name}",
+              "branches": [{"name": branch, "count": count} for _, _, _, branch, count in rows]}
+             for (_, building, room_name), rows in groupby(counts, key=lambda x: x[:3])]
+    return halls, sum(row[4] for row in counts)
+
 @api_bp.route('/admin/master-chart', methods=['GET'])
+@cached_report
 def get_master_chart():
     exam_id = request.args.get('exam_id')  # <--- NEW
     date_str = request.args.get('date')
@@ -766,41 +1067,22 @@ def get_master_chart():
         return jsonify({"error": "Exam Selection required"}), 400
     
     try:
-        query = (db.session.query(SeatAssignment)
-                       .join(Exam)
-                       .join(Room).join(Student))
-
         # LOGIC CHANGE: Prefer Exam ID
         if exam_id:
-            query = query.filter(Exam.id == int(exam_id))
+            filters = [Exam.id == int(exam_id)]
             exam_obj = Exam.query.get(int(exam_id))
             exam_title = exam_obj.name
             exam_time = exam_obj.time_slot
             exam_date = exam_obj.date # For date headers
         else:
             exam_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-            query = query.filter(Exam.date == exam_date, Exam.time_slot.ilike(f"%{time.strip()}%"))
+            filters = [Exam.date == exam_date, Exam.time_slot.ilike(f"%{time.strip()}%")]
             exam_title = "Semester Examination"
             exam_time = time
 
-        assignments = query.order_by(Room.building, Room.name, Student.branch).all()
+        master_data, grand_total = master_chart_halls(filters)
                           
-        if not assignments: return jsonify({"error": "No data found."}), 404
-            
-        # ... (Keep existing grouping logic) ...
-        master_data = []
-        grand_total = 0
-        
-        for room, r_seats in groupby(assignments, key=lambda x: x.room):
-            r_seats_list = list(r_seats)
-            room_entry = { "hall_no": f"{room.building} - {room.name}", "branches": [] }
-            
-            r_seats_list.sort(key=lambda x: x.student.branch)
-            for branch, b_seats in groupby(r_seats_list, key=lambda x: x.student.branch):
-                count = len(list(b_seats))
-                room_entry["branches"].append({ "name": branch, "count": count })
-                grand_total += count
-            master_data.append(room_entry)
+        if not master_data: return jsonify({"error": "No data found."}), 404
             
         date_headers = []
         for i in range(6):
@@ -920,99 +1202,159 @@ def get_exams_on_date():
         return jsonify({'error': str(e)}), 500
 
 # --- UPDATE THE EXISTING ATTENDANCE FUNCTION ---
+ATTENDANCE_PER_PAGE = 12
+ATTENDANCE_CHUNK_SIZE = 500
+
+def attendance_pages(rows, per_page=ATTENDANCE_PER_PAGE):
+    """
+    Attendance sheet pages from seat rows (hall, branch, exam name, session,
+    reg no, name) ordered by hall, branch, reg no. Serial numbers run on
+    across the pages of a hall x branch. Yields each page once it is full or
+    its group ends, so only one page is held at a time.
+    """
+    page, group, sl = None, None, 0
+    for hall, branch, exam_name, session, reg_no, name in rows:
+        if group is None or group['hall_no'] != hall or group['branch'] != branch:
+            if page: yield page
+            # Header fields come from the group's first seat
+            group = {'hall_no': hall, 'exam_name': exam_name, 'semester': session, 'branch': branch}
+            page, sl = None, 0
+        if page is None or len(page['students']) == per_page:
+            if page: yield page
+            page = dict(group, students=[])
+        sl += 1
+        page['students'].append({'reg_no': reg_no, 'name': name, 'sl': sl})
+    if page: yield page
+
+def attendance_rows(filters, room_id=None):
+    """
+    Seat rows for attendance_pages (plain columns, read from the cursor in chunks),
+    ordered by Room, Branch, then Registration Number (numeric): pages come out in print order.
+    """
+    query = (db.session.query(Room.name, Student.branch, Exam.name, Student.session,
+                              Student.registration_number, Student.name)
+             .select_from(SeatAssignment)
+             .join(Exam, SeatAssignment.exam_id == Exam.id)
+             .join(Student, SeatAssignment.student_id == Student.id)
+             .join(Room, SeatAssignment.room_id == Room.id)
+             .filter(*filters))
+    if room_id and room_id != 'all':
+        query = query.filter(Room.id == int(room_id))
+    return (query.order_by(Room.name, Student.branch, Student.sort_key, Student.registration_number)
+            .yield_per(ATTENDANCE_CHUNK_SIZE))
+
 @api_bp.route('/admin/attendance-sheet-data', methods=['GET'])
+@cached_report
 def attendance_sheet_data():
+    """
+    All attendance sheet pages of an exam (optionally one room).
+    stream=1 sends them as NDJSON, one page per line, as the ordered cursor
+    produces them: the first hall can render while later halls are still read.
+    """
     try:
         # 1. Get parameters
         exam_id = request.args.get('exam_id')
         date_str = request.args.get('date')
         time_slot = request.args.get('time')
         room_id = request.args.get('room_id')
+        stream = request.args.get('stream', '').lower() in ('1', 'true', 'yes')
 
         # Validation: Require either specific Exam ID OR Date+Time
         if not exam_id and (not date_str or not time_slot):
             return jsonify({'error': 'Exam Selection required'}), 400
 
-        # 2. Build Query
-        query = db.session.query(SeatAssignment).join(Exam).join(Student).join(Room)
-
-        # Prefer Exam ID
+        # 2. Build Query (Prefer Exam ID)
         if exam_id:
-            query = query.filter(Exam.id == int(exam_id))
+            filters = [Exam.id == int(exam_id)]
         else:
             search_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-            query = query.filter(
-                Exam.date == search_date,
-                Exam.time_slot.ilike(f"%{time_slot.strip()}%")
-            )
+            filters = [Exam.date == search_date, Exam.time_slot.ilike(f"%{time_slot.strip()}%")]
+        query = attendance_rows(filters, room_id)
 
-        if room_id and room_id != 'all':
-            query = query.filter(Room.id == int(room_id))
-
-        # Order by Room, Branch, then Registration Number
-        assignments = query.order_by(Room.name, Student.branch, Student.registration_number).all()
-
-        if not assignments:
-            return jsonify({'sheets': []})
-
-        # 3. Group Data First (Room + Branch)
-        grouped_data = {}
-        for seat in assignments:
-            r_name = seat.room.name
-            b_name = seat.student.branch
-            # Create a unique key for Room + Branch combo
-            key = (r_name, b_name)
-            
-            if key not in grouped_data:
-                grouped_data[key] = {
-                    'hall_no': r_name,
-                    'exam_name': seat.exam.name,
-                    'semester': seat.student.session, 
-                    'branch': b_name,
-                    'students': []
-                }
-            
-            # Append student details
-            grouped_data[key]['students'].append({
-                'reg_no': seat.student.registration_number, 
-                'name': seat.student.name
-            })
+        if stream:
+            def generate():
+                try:
+                    for page in attendance_pages(query):
+                        yield json.dumps(page) + '\n'
+                except Exception as e:
+                    print(f"Error streaming attendance: {e}")
+                    yield json.dumps({'error': str(e)}) + '\n'
+            return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
 
-        # 4. Split into Pages of 15 (Max)
-        final_sheets = []
-        MAX_PER_PAGE = 12
+        return jsonify({'sheets': list(attendance_pages(query))})
 
-        for key, group in grouped_data.items():
-            all_students = group['students']
-            total_students = len(all_students)
-            
-            # Slice the student list into chunks of 15
-            for i in range(0, total_students, MAX_PER_PAGE):
-                chunk = all_students[i : i + MAX_PER_PAGE]
-                
-                # Create a new sheet object for this page
-                sheet_page = {
-                    'hall_no': group['hall_no'],
-                    'exam_name': group['exam_name'],
-                    'semester': group['semester'],
-                    'branch': group['branch'],
-                    'students': []
-                }
-                
-                # Add students to this page with Continuous Serial Numbers
-                for idx, student in enumerate(chunk):
-                    student_with_sl = student.copy()
-                    # Serial Number = Offset + Index + 1 (e.g., 16, 17, 18...)
-                    student_with_sl['sl'] = i + idx + 1 
-                    sheet_page['students'].append(student_with_sl)
-                
-                final_sheets.append(sheet_page)
+    except Exception as e:
+        print(f"Error generating attendance: {e}")
+        return jsonify({'error': str(e)}), 500
 
-        # 5. Final Sort: Hall -> Branch -> Starting Serial Number
-        final_sheets.sort(key=lambda x: (x['hall_no'], x['branch'], x['students'][0]['sl']))
+def export_hall_data(entries, filters, id_type='roll', room_id=None):
+    """
+    Hall data for export entries (report, hall name, options), yielded in entry
+    order (attendance halls, then notice board, then master chart). Attendance
+    only reads the rows of the halls asked for, one hall at a time.
+    """
+    wanted = {}
+    for report, name, _ in entries: wanted.setdefault(report, []).append(name)
+    if wanted.get('attendance'):
+        rows = attendance_rows(filters + [Room.name.in_(wanted['attendance'])], room_id)
+        for hall_no, pages in groupby(attendance_pages(rows), key=lambda p: p['hall_no']):
+            yield {'hall_no': hall_no, 'pages': list(pages)}
+    if wanted.get('notice-board'):
+        halls = {hall['hall_no']: hall for hall in notice_board_halls(filters, id_type, room_id)}
+        for name in wanted['notice-board']: yield halls[name]
+    if wanted.get('master-chart'):
+        halls, grand_total = master_chart_halls(filters)  # Whole exam overview: not per room
+        yield {'halls': halls, 'grand_total': grand_total}
+
+@api_bp.route('/admin/export', methods=['GET'])
+def export_reports():
+    """
+    Printable reports of one exam rendered on the server, as one zip download:
+    ?exam_id=&reports=attendance,notice-board,master-chart&format=html|csv
+    [&room_id=][&subjects=3][&id_type=roll|reg]
+    One file per hall, rendered in worker processes and cached per seating version.
+    Only the hall list is read up front; report data is read for uncached halls, as the zip streams.
+    """
+    exam = db.session.get(Exam, request.args.get('exam_id', type=int) or 0)
+    if not exam: return jsonify({"error": "Exam not found"}), 404
+
+    fmt = request.args.get('format', 'html').lower()
+    reports = [r.strip() for r in request.args.get('reports', ','.join(EXPORT_REPORTS)).split(',') if r.strip()]
+    if fmt not in EXPORT_FORMATS: return jsonify({"error": f"format must be one of {', '.join(EXPORT_FORMATS)}"}), 400
+    unknown = [r for r in reports if r not in EXPORT_REPORTS]
+    if unknown: return jsonify({"error": f"Unknown report: {', '.join(unknown)}"}), 400
 
-        return jsonify({'sheets': final_sheets})
+    room_id = request.args.get('room_id')
+    id_type = 'reg' if request.args.get('id_type') == 'reg' else 'roll'
+    subjects = min(max(request.args.get('subjects', 3, type=int), 1), 6)
+    header = {'title': exam.name, 'date': exam.date.strftime('%d-%m-%Y'), 'time': exam.time_slot}
+    filters = [Exam.id == exam.id]
 
+    try:
+        # Archive entries from the rooms holding seats, in each report's hall order
+        seated = (db.session.query(Room.id, Room.building, Room.name).select_from(SeatAssignment)
+                  .join(Exam, SeatAssignment.exam_id == Exam.id)
+                  .join(Room, SeatAssignment.room_id == Room.id)
+                  .filter(*filters).distinct())
+        if room_id and room_id != 'all':
+            seated = seated.filter(Room.id == int(room_id))
+        entries = []
+        if 'attendance' in reports:
+            entries += [('attendance', name, {'subjects': subjects})
+                        for (name,) in seated.with_entities(Room.name).order_by(Room.name)]
+        if 'notice-board' in reports:
+            entries += [('notice-board', f"{building} - {name}", dict(header, id_type=id_type))
+                        for _, building, name in seated.order_by(Room.building, Room.name, Room.id)]
+        if 'master-chart' in reports and SeatAssignment.query.filter_by(exam_id=exam.id).first():
+            entries.append(('master-chart', 'master-chart', header))
+        if not entries: return jsonify({"error": "No seating found."}), 404
+
+        cache_dir = export_cache_dir(current_app.config['EXPORT_CACHE_DIR'], exam.id, seating_version())
     except Exception as e:
-        print(f"Error generating attendance: {e}")
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        print(f"Error preparing export: {e}")
+        return jsonify({"error": str(e)}), 500
+
+    load_halls = lambda missing: export_hall_data(missing, filters, id_type, room_id)
+    response = Response(stream_with_context(export_zip(entries, fmt, cache_dir, load_halls)), mimetype='application/zip')
+    response.headers['Content-Disposition'] = f'attachment; filename="exam-{exam.id}-reports-{fmt}.zip"'
+    return response
@@ -2,6 +2,14 @@ from app import db
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
+from sqlalchemy.orm import validates
+
+MAX_SORT_KEY = 2**63 - 1  # BigInteger range
+
+def student_sort_key(registration_number):
+    """Numeric order of a registration number: digits only, so '2311001' < '23030480039'."""
+    digits = ''.join(filter(str.isdigit, str(registration_number or '')))
+    return min(int(digits), MAX_SORT_KEY) if digits else 0
 
 # --- STUDENT MODEL (Updated with Password) ---
 class Student(UserMixin, db.Model):
@@ -10,6 +18,7 @@ class Student(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     roll_number = db.Column(db.String(20), unique=True, nullable=False, index=True)
     registration_number = db.Column(db.String(50), unique=True, nullable=False)
+    sort_key = db.Column(db.BigInteger, nullable=False, default=0) # student_sort_key(registration_number)
     name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
     branch = db.Column(db.String(50), nullable=False)
@@ -20,6 +29,15 @@ class Student(UserMixin, db.Model):
     password_hash = db.Column(db.String(255), nullable=False) # Changed size for hash
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # Seating and reports read students pre-sorted from this index
+    __table_args__ = (db.Index('ix_students_session_branch_sort_key', 'session', 'branch', 'sort_key'),)
+
+    @validates('registration_number')
+    def _fill_sort_key(self, key, value):
+        # Runs on insert (constructor), update and bulk upload alike
+        self.sort_key = student_sort_key(value)
+        return value
+
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
 
@@ -55,6 +73,7 @@ class Room(db.Model):
     total_columns = db.Column(db.Integer, nullable=False) # e.g., 6
     capacity = db.Column(db.Integer, nullable=False)  # rows * columns (Auto-calculated usually)
     layout_matrix = db.Column(db.Text, nullable=True)
+    layout_bitmap = db.Column(db.LargeBinary, nullable=True) # layout_matrix packed 1 bit/cell (NULL = all seats)
 
     def __repr__(self):
         return f'<Room {self.name} ({self.total_rows}x{self.total_columns})>'
@@ -66,6 +85,7 @@ class Exam(db.Model):
     subject_code = db.Column(db.String(20), nullable=False) # e.g., "IT-301"
     date = db.Column(db.Date, nullable=False)
     time_slot = db.Column(db.String(50), nullable=False) # e.g., "10:00 AM - 01:00 PM"
+    plan_hash = db.Column(db.String(40)) # inputs_fingerprint of the stored seating plan (None = unknown)
 
 class SeatAssignment(db.Model):
     __tablename__ = 'seat_assignments'
@@ -106,4 +126,27 @@ class Invigilation(db.Model):
     # Relationships
     teacher = db.relationship('Teacher', backref='duties')
     exam = db.relationship('Exam', backref='invigilators')
-    room = db.relationship('Room', backref='invigilations')
\ No newline at end of file
+    room = db.relationship('Room', backref='invigilations')
+
+class SeatingJob(db.Model):
+    """A generate-seating request run by the background worker (see services/seating_jobs.py)."""
+    __tablename__ = 'seating_jobs'
+    id = db.Column(db.String(32), primary_key=True) # uuid4 hex
+    status = db.Column(db.String(20), nullable=False, default='queued') # queued / running / writing / done / failed
+    request_data = db.Column(db.Text, nullable=False) # JSON body of the generate-seating request
+    exam_id = db.Column(db.Integer, db.ForeignKey('exams.id'), nullable=True)
+
+    # Progress
+    rooms_total = db.Column(db.Integer, nullable=False, default=0)
+    rooms_done = db.Column(db.Integer, nullable=False, default=0)
+    students_total = db.Column(db.Integer, nullable=False, default=0)
+    students_seated = db.Column(db.Integer, nullable=False, default=0)
+    message = db.Column(db.Text, nullable=True) # Result or error text
+
+    # Liveness: the process running the job ("host:pid") refreshes heartbeat_at while it is active
+    owner = db.Column(db.String(100), nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
@@ -1,95 +1,581 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from array import array
+from collections import OrderedDict
+from datetime import date
+from itertools import groupby
 import numpy as np
+import scipy.sparse as sp
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.neighbors import NearestNeighbors
 
-class SeatFinderAI:
-    def __init__(self):
-        self.vectorizer = None
-        self.nn_model = None
-        self.search_tokens = []  
-        self.token_map = {}      
-        self.is_trained = False
+# Record columns (one row per seat, shared by its tokens) hold small integer
+# codes into per-shard tables, so each room/building/seat name is stored once
+INTERNED_FIELDS = ('seat', 'room', 'building')
+
+# Fuzzy search: a candidate must share this fraction of the query's trigrams
+MIN_SHARED_TRIGRAMS = 0.5
+MAX_CANDIDATES = 20000
+
+# Suggestions for near misses: weaker candidates are noise, not help
+SUGGESTION_MIN_CONFIDENCE = 0.2
+
+# Lookup scope: date=upcoming widens the default (next exam date) to every exam from today on
+ALL_UPCOMING = 'upcoming'
+
+# Negative-result cache: repeated bad queries are answered without searching again
+MISS_CACHE_TTL = 30  # seconds
+MISS_CACHE_SIZE = 10000
+
+def normalize(value):
+    """Trim and case-fold a roll/registration number for exact matching."""
+    return str(value).strip().casefold()
+
+def digits_key(value):
+    """Digits-only form, so '2311-001' and '2311001' land on the same key."""
+    return ''.join(filter(str.isdigit, str(value)))
+
+def mask_name(name):
+    """'Rahul Kumar' -> 'R**** K****': enough to recognise yourself, not to identify others."""
+    return ' '.join(word[0] + '*' * (len(word) - 1) for word in str(name or '').split())
+
+def mask_token(token):
+    """
+    Keeps at most a third of an ID at each end and always stars at least half:
+    '23030480011' -> '230******11', '2311001' -> '23****1'.
+    """
+    token = str(token)
+    head = len(token) // 3
+    tail = min(head, len(token) // 2 - head)
+    return token[:head] + '*' * (len(token) - head - tail) + token[len(token) - tail:]
+
+def _code_array(codes, table_size):
+    return np.asarray(codes, dtype=np.uint16 if table_size <= 0xFFFF else np.int32)
 
-    def train(self, student_data):
+def _sorted_lookup(keys, positions, key):
+    # Binary search over a sorted key column (works the same on mmap'd arrays)
+    i = int(np.searchsorted(keys, key))
+    if i < len(keys) and keys[i] == key:
+        return int(positions[i])
+    return None
+
+class SeatIndex:
+    """
+    Read-only lookup index for one shard (the seats of one exam).
+    Never modified after construction.
+    """
+
+    def __init__(self, vectorizer, tfidf_matrix, post_indptr, post_rows, trigram_mask,
+                 search_tokens, token_rows, student_ids, codes, names, masked_names,
+                 exact_keys, exact_pos, digit_keys, digit_pos, exam_id=None, exam_date=None):
+        self.vectorizer = vectorizer
+        self.tfidf_matrix = tfidf_matrix
+        self.post_indptr = post_indptr      # inverted index: gram -> token rows
+        self.post_rows = post_rows
+        self.trigram_mask = trigram_mask    # gram column is a trigram
+        self.search_tokens = search_tokens  # token strings (UTF-8 bytes)
+        self.token_rows = token_rows        # token -> record row
+        self.student_ids = student_ids      # record row -> student id
+        self.codes = codes                  # field -> record row -> code
+        self.names = names                  # field -> code -> interned name
+        self.masked_names = masked_names    # record row -> masked student name (UTF-8 bytes)
+        self.exact_keys = exact_keys        # sorted normalized tokens (UTF-8 bytes)
+        self.exact_pos = exact_pos          # -> token index
+        self.digit_keys = digit_keys        # sorted digits-only keys (unambiguous only)
+        self.digit_pos = digit_pos
+        self.exam_id = exam_id
+        self.exam_date = exam_date          # 'YYYY-MM-DD' or None
+
+    @classmethod
+    def build(cls, student_data, exam_id=None, exam_date=None):
         """
-        Expects list of dicts: 
+        Expects an iterable of dicts (a list or a streaming generator):
         [{'registration_number': '...', 'roll_number': '...', 'seat': '...', ...}]
+        Returns (index or None, number of records consumed).
         """
-        print(f"--- 🤖 AI TRAINING STARTED with {len(student_data)} records ---")
-        
-        if not student_data:
-            print("❌ AI Error: No student data provided to train.")
-            self.is_trained = False
-            return
-
-        self.search_tokens = []
-        self.token_map = {}
+        tokens, token_rows = [], array('i')
+        student_ids = array('i')
+        masked_names = []
+        codes = {field: array('i') for field in INTERNED_FIELDS}
+        tables = {field: {} for field in INTERNED_FIELDS}
+        record_count = 0
 
         for s in student_data:
+            row = record_count
+            record_count += 1
+            student_ids.append(int(s.get('student_id') or 0))
+            masked_names.append(mask_name(s.get('name')).encode())
+            for field in INTERNED_FIELDS:
+                table = tables[field]
+                codes[field].append(table.setdefault(str(s.get(field) or ''), len(table)))
+
             # Index Registration Number
             if s.get('registration_number'):
-                reg = str(s['registration_number']).strip()
-                self.search_tokens.append(reg)
-                self.token_map[reg] = s
+                tokens.append(str(s['registration_number']).strip())
+                token_rows.append(row)
 
             # Index Roll Number
             if s.get('roll_number'):
-                roll = str(s['roll_number']).strip()
-                self.search_tokens.append(roll)
-                self.token_map[roll] = s
+                tokens.append(str(s['roll_number']).strip())
+                token_rows.append(row)
+
+        if not record_count:
+            print("❌ AI Error: No student data provided to train.")
+            return None, 0
 
         # Validation
-        if not self.search_tokens:
+        if not tokens:
             print("❌ AI Error: No valid Registration/Roll numbers found.")
-            self.is_trained = False
-            return
+            return None, record_count
+
+        token_rows = np.asarray(token_rows, dtype=np.int32)
+        exact_keys, exact_pos, digit_keys, digit_pos = cls._exact_tier(tokens, token_rows)
+
+        # 1. Convert strings to N-Grams (Vectorization)
+        vectorizer = TfidfVectorizer(analyzer='char', ngram_range=(2, 3), dtype=np.float32)
+        # Rows are L2-normalized, so cosine similarity is a plain dot product
+        tfidf_matrix = vectorizer.fit_transform(tokens).tocsr()
+        tfidf_matrix.sort_indices()
+
+        # 2. Inverted index: the same matrix, column-major (gram -> token rows)
+        postings = tfidf_matrix.tocsc()
+        postings.sort_indices()
+        trigram_mask = np.zeros(len(vectorizer.vocabulary_), dtype=bool)
+        for gram, col in vectorizer.vocabulary_.items():
+            trigram_mask[col] = len(gram) == 3
+
+        index = cls(vectorizer, tfidf_matrix,
+                    postings.indptr.astype(np.int64), postings.indices.astype(np.int32), trigram_mask,
+                    np.array([t.encode() for t in tokens], dtype=bytes), token_rows,
+                    np.asarray(student_ids, dtype=np.int32),
+                    {field: _code_array(codes[field], len(tables[field])) for field in INTERNED_FIELDS},
+                    {field: np.array(list(tables[field]), dtype=str) for field in INTERNED_FIELDS},
+                    np.array(masked_names, dtype=bytes),
+                    exact_keys, exact_pos, digit_keys, digit_pos, exam_id, exam_date)
+        return index, record_count
+
+    @staticmethod
+    def _exact_tier(tokens, token_rows):
+        normalized = np.array([normalize(t).encode() for t in tokens], dtype=bytes)
+        order = np.argsort(normalized, kind='stable')
+
+        # Digits-only keys: drop any key shared by two different records
+        digit_owner = {}
+        for pos, token in enumerate(tokens):
+            digits = digits_key(token)
+            if not digits: continue
+            row = int(token_rows[pos])
+            if digits in digit_owner and digit_owner[digits] is not None \
+                    and token_rows[digit_owner[digits]] != row:
+                digit_owner[digits] = None
+            elif digits not in digit_owner:
+                digit_owner[digits] = pos
+        # All-digit tokens are already exact keys; the digits tier probes those first
+        exact = set(normalized.tolist())
+        keys = sorted(k for k, v in digit_owner.items() if v is not None and k.encode() not in exact)
+        return (normalized[order], order.astype(np.int32),
+                np.array([k.encode() for k in keys], dtype=bytes),
+                np.array([digit_owner[k] for k in keys], dtype=np.int32))
+
+    def __len__(self):
+        return len(self.search_tokens)
+
+    def exact_lookup(self, query):
+        """Tier 1/2: dictionary hits. Returns (token index, tier) or (None, None)."""
+        pos = _sorted_lookup(self.exact_keys, self.exact_pos, normalize(query).encode())
+        if pos is not None:
+            return pos, "exact"
+        digits = digits_key(query)
+        if digits:
+            pos = _sorted_lookup(self.exact_keys, self.exact_pos, digits.encode())
+            if pos is None:
+                pos = _sorted_lookup(self.digit_keys, self.digit_pos, digits.encode())
+            if pos is not None:
+                return pos, "digits"
+        return None, None
+
+    def success(self, token_idx, confidence, tier):
+        row = self.token_rows[token_idx]
+        student_id = int(self.student_ids[row])
+        return {
+            "status": "success",
+            "tier": tier,
+            "match_found": bytes(self.search_tokens[token_idx]).decode(),
+            "exam_id": self.exam_id,
+            "student_id": student_id or None,
+            "confidence": round(float(confidence), 2),
+            "seat_details": {
+                "building": self.name_of('building', row),
+                "room": self.name_of('room', row),
+                "seat": self.name_of('seat', row)
+            }
+        }
+
+    def suggestion(self, token_idx, confidence):
+        """A near-miss candidate: masked identity plus where that student sits."""
+        row = self.token_rows[token_idx]
+        return {
+            "match": mask_token(bytes(self.search_tokens[token_idx]).decode()),
+            "name": bytes(self.masked_names[row]).decode() or None,
+            "exam_id": self.exam_id,
+            "confidence": round(float(confidence), 2),
+            "seat_details": {
+                "building": self.name_of('building', row),
+                "room": self.name_of('room', row),
+                "seat": self.name_of('seat', row)
+            }
+        }
+
+    def name_of(self, field, row):
+        return str(self.names[field][self.codes[field][row]]) or 'Unknown'
+
+    def _candidates(self, cols):
+        """
+        Token rows sharing at least MIN_SHARED_TRIGRAMS of the query's trigrams.
+        Prefix filter: any such row must appear in one of the (m - T + 1)
+        shortest posting lists, so the long, common-gram lists are never read.
+        """
+        grams = cols[self.trigram_mask[cols]]
+        if not len(grams): grams = cols  # Very short query: fall back to bigrams
+        if not len(grams): return np.array([], dtype=np.int32)
+
+        lengths = self.post_indptr[grams + 1] - self.post_indptr[grams]
+        need = max(1, int(np.ceil(len(grams) * MIN_SHARED_TRIGRAMS)))
+        scan = grams[np.argsort(lengths, kind='stable')[:len(grams) - need + 1]]
+        rows = np.concatenate([self.post_rows[self.post_indptr[g]:self.post_indptr[g + 1]] for g in scan])
+
+        rows, shared = np.unique(rows, return_counts=True)
+        if len(rows) > MAX_CANDIDATES:
+            rows = np.sort(rows[np.argpartition(-shared, MAX_CANDIDATES)[:MAX_CANDIDATES]])
+        return rows
+
+    def kneighbors(self, query_matrix, k=1):
+        """
+        Cosine top-k for each query row, scored only over trigram candidates.
+        At most one token per record (a seat's roll and registration number
+        often both rank), best first.
+        Returns (similarities, token indices), each shaped (queries, k);
+        unfilled slots are 0.0 / -1.
+        """
+        similarities = np.zeros((query_matrix.shape[0], k))
+        indices = np.full((query_matrix.shape[0], k), -1, dtype=np.int64)
+        for n in range(query_matrix.shape[0]):
+            query_vec = query_matrix[n]
+            candidates = self._candidates(query_vec.indices)
+            if not len(candidates): continue
+            sims = (self.tfidf_matrix[candidates] @ query_vec.T).toarray().ravel()
+            if k == 1:
+                top = np.array([sims.argmax()])
+            else:
+                top = np.argpartition(-sims, 2 * k)[:2 * k] if len(sims) > 2 * k else np.arange(len(sims))
+                top = top[np.argsort(-sims[top], kind='stable')]
+                _, first = np.unique(self.token_rows[candidates[top]], return_index=True)
+                top = top[np.sort(first)][:k]
+            similarities[n, :len(top)], indices[n, :len(top)] = sims[top], candidates[top]
+        return similarities, indices
+
+    # ------------------------------------------
+    # On-disk snapshot (shared by all workers via mmap)
+    # ------------------------------------------
+
+    def _snapshot_arrays(self):
+        arrays = {
+            'search_tokens': self.search_tokens,
+            'token_rows': self.token_rows,
+            'exact_keys': self.exact_keys, 'exact_pos': self.exact_pos,
+            'digit_keys': self.digit_keys, 'digit_pos': self.digit_pos,
+            'idf': self.vectorizer.idf_,
+            'tfidf_data': self.tfidf_matrix.data,
+            'tfidf_indices': self.tfidf_matrix.indices,
+            'tfidf_indptr': self.tfidf_matrix.indptr,
+            'post_indptr': self.post_indptr, 'post_rows': self.post_rows,
+            'trigram_mask': self.trigram_mask,
+        }
+        arrays['student_ids'] = self.student_ids
+        arrays['masked_names'] = self.masked_names
+        for field in INTERNED_FIELDS:
+            arrays[f'code_{field}'] = self.codes[field]
+            arrays[f'names_{field}'] = self.names[field]
+        return arrays
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        for key, arr in self._snapshot_arrays().items():
+            np.save(os.path.join(path, f"{key}.npy"), np.asarray(arr))
+        with open(os.path.join(path, 'vocabulary.json'), 'w') as f:
+            json.dump({k: int(v) for k, v in self.vectorizer.vocabulary_.items()}, f)
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump({'shape': list(self.tfidf_matrix.shape),
+                       'exam_id': self.exam_id, 'exam_date': self.exam_date}, f)
 
+    @classmethod
+    def load(cls, path):
+        """Memory-maps one shard written by save()."""
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+
+        def mapped(key):
+            return np.load(os.path.join(path, f"{key}.npy"), mmap_mode='r')
+
+        with open(os.path.join(path, 'vocabulary.json')) as f:
+            vocabulary = json.load(f)
+        vectorizer = TfidfVectorizer(analyzer='char', ngram_range=(2, 3), vocabulary=vocabulary, dtype=np.float32)
+        vectorizer.idf_ = np.asarray(mapped('idf'))
+
+        tfidf_matrix = sp.csr_matrix(
+            (mapped('tfidf_data'), mapped('tfidf_indices'), mapped('tfidf_indptr')),
+            shape=tuple(meta['shape']))
+        return cls(vectorizer, tfidf_matrix,
+                   mapped('post_indptr'), mapped('post_rows'), mapped('trigram_mask'),
+                   mapped('search_tokens'), mapped('token_rows'), mapped('student_ids'),
+                   {field: mapped(f'code_{field}') for field in INTERNED_FIELDS},
+                   {field: mapped(f'names_{field}') for field in INTERNED_FIELDS},
+                   mapped('masked_names'),
+                   mapped('exact_keys'), mapped('exact_pos'),
+                   mapped('digit_keys'), mapped('digit_pos'),
+                   meta['exam_id'], meta['exam_date'])
+
+class ShardedIndex:
+    """
+    One complete, read-only build of the lookup index: a shard per exam,
+    ordered by exam date. Never modified after construction: retraining builds
+    a new ShardedIndex and SeatFinderAI publishes it with a single reference
+    assignment, so a reader always sees tokens, records and matrices from the
+    same build.
+    """
+
+    def __init__(self, shards, data_version=None):
+        self.shards = sorted(shards, key=lambda sh: (sh.exam_date or '', sh.exam_id or 0))
+        self.by_exam = {sh.exam_id: sh for sh in self.shards}
+        self.data_version = data_version
+
+    @classmethod
+    def build(cls, student_data, data_version=None):
+        """
+        student_data must arrive grouped by exam (e.g. ORDER BY exam date, exam id);
+        each group becomes one shard as soon as it has been read.
+        No upcoming seating still gives an (empty) index carrying data_version,
+        so lookups treat it as trained until the data changes.
+        Returns (index, number of records consumed).
+        """
+        shards, record_count = [], 0
+        for exam_id, rows in groupby(student_data, key=lambda s: s.get('exam_id')):
+            rows = list(rows)
+            exam_date = rows[0].get('exam_date')
+            shard, count = SeatIndex.build(rows, exam_id, str(exam_date) if exam_date else None)
+            record_count += count
+            if shard is not None: shards.append(shard)
+
+        if not record_count:
+            print("ℹ️ AI: No upcoming seating to index.")
+        return cls(shards, data_version), record_count
+
+    def __len__(self):
+        return sum(len(sh) for sh in self.shards)
+
+    def select(self, exam_id=None, exam_date=None, today=None):
+        """
+        Shards a query should search, in date order: one exam, one date,
+        every exam from today onwards (exam_date=ALL_UPCOMING) or, by default,
+        the exams of the first seated date on or after today.
+        Undated shards are searched unless a date is given.
+        """
+        if exam_id is not None:
+            shard = self.by_exam.get(exam_id)
+            return [shard] if shard else []
+        today = str(today or date.today())
+        if exam_date == ALL_UPCOMING:
+            return [sh for sh in self.shards if sh.exam_date is None or sh.exam_date >= today]
+        if exam_date is not None:
+            return [sh for sh in self.shards if sh.exam_date == str(exam_date)]
+        # Shards are in date order: the first one from today sets the date
+        nearest = next((sh.exam_date for sh in self.shards if sh.exam_date and sh.exam_date >= today), None)
+        return [sh for sh in self.shards if sh.exam_date is None or sh.exam_date == nearest]
+
+    def save(self, directory, version):
+        """
+        Writes every shard under directory/<version hash>/ and points
+        directory/CURRENT at it. Safe against concurrent writers: the snapshot
+        is staged in a temp dir and published with renames.
+        """
+        name = hashlib.sha1(str(version).encode()).hexdigest()[:16]
+        target = os.path.join(directory, name)
+        staging = f"{target}.tmp{os.getpid()}"
+        os.makedirs(staging, exist_ok=True)
+        try:
+            for n, shard in enumerate(self.shards):
+                shard.save(os.path.join(staging, f"shard-{n}"))
+            with open(os.path.join(staging, 'meta.json'), 'w') as f:
+                json.dump({'version': str(version), 'shards': len(self.shards)}, f)
+            try:
+                os.rename(staging, target)
+            except OSError:
+                shutil.rmtree(staging, ignore_errors=True)  # Another worker published it first
+
+            pointer = os.path.join(directory, f"CURRENT.tmp{os.getpid()}")
+            with open(pointer, 'w') as f: f.write(name)
+            os.replace(pointer, os.path.join(directory, 'CURRENT'))
+        except Exception as e:
+            shutil.rmtree(staging, ignore_errors=True)
+            print(f"❌ AI snapshot save failed: {e}")
+            return False
+
+        # Old snapshots stay readable for workers that still have them mapped (POSIX)
+        for entry in os.listdir(directory):
+            if entry not in (name, 'CURRENT') and '.tmp' not in entry:
+                shutil.rmtree(os.path.join(directory, entry), ignore_errors=True)
+        return True
+
+    @classmethod
+    def load(cls, directory, version=None):
+        """Memory-maps the published snapshot. Returns None if missing or stale."""
         try:
-            # 1. Convert strings to N-Grams (Vectorization)
-            self.vectorizer = TfidfVectorizer(analyzer='char', ngram_range=(2, 3))
-            tfidf_matrix = self.vectorizer.fit_transform(self.search_tokens)
-
-            # 2. Fit KNN Model
-            self.nn_model = NearestNeighbors(n_neighbors=1, metric='cosine')
-            self.nn_model.fit(tfidf_matrix)
-            self.is_trained = True
-            print(f"✅ AI TRAINING COMPLETE. Indexed {len(self.search_tokens)} search keys.")
-            
+            with open(os.path.join(directory, 'CURRENT')) as f:
+                path = os.path.join(directory, f.read().strip())
+            with open(os.path.join(path, 'meta.json')) as f:
+                meta = json.load(f)
+            if version is not None and meta['version'] != str(version):
+                return None
+            shards = [SeatIndex.load(os.path.join(path, f"shard-{n}")) for n in range(meta['shards'])]
+            return cls(shards, meta['version'])
+        except (OSError, ValueError, KeyError) as e:
+            print(f"AI snapshot not loaded: {e}")
+            return None
+
+class SeatFinderAI:
+    def __init__(self):
+        self._miss_lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self._index = None
+        with self._miss_lock:
+            self._misses = OrderedDict()
+
+    @property
+    def index(self):
+        return self._index
+
+    @property
+    def is_trained(self):
+        return self._index is not None
+
+    @property
+    def data_version(self):
+        index = self._index
+        return index.data_version if index else None
+
+    def train(self, student_data, data_version=None):
+        """
+        Builds a fresh index from an iterable of record dicts and swaps it in.
+        Lookups keep using the previous index until the swap.
+        Returns the number of records consumed.
+        """
+        print("--- 🤖 AI TRAINING STARTED ---")
+        try:
+            index, record_count = ShardedIndex.build(student_data, data_version)
         except Exception as e:
             print(f"❌ AI Crash during training: {str(e)}")
-            self.is_trained = False
+            return 0
+        self._index = index  # Single reference swap: readers never see a half-built index
+        print(f"✅ AI TRAINING COMPLETE. Indexed {len(index)} search keys from {record_count} records in {len(index.shards)} exam shards.")
+        return record_count
 
-    def find_seat(self, query):
-        if not self.is_trained:
-            return {"status": "error", "message": "AI not trained yet"}
+    def find_seat(self, query, exam_id=None, exam_date=None, suggestions=0):
+        return self.find_seats([query], exam_id, exam_date, suggestions)[0]
 
+    def find_seats(self, queries, exam_id=None, exam_date=None, suggestions=0):
+        """
+        Batch lookup within the selected exam shards (see ShardedIndex.select).
+        Exact hits are answered from the key arrays, earliest exam first. All
+        misses go through one vectorizer.transform and one neighbour search per
+        shard; the best match wins, the earlier exam on ties.
+        With suggestions=k, a fuzzy no_match also lists up to k candidates
+        (masked, with confidence) taken from that same neighbour search.
+        Results come back in input order.
+        """
+        index = self._index  # Pin one build for the whole call
+        if index is None:
+            return [{"status": "error", "message": "AI not trained yet"} for _ in queries]
+        shards = index.select(exam_id, exam_date)
+        if not shards:
+            return [{"status": "no_match", "message": "No upcoming exam for this selection"} for _ in queries]
+
+        results = [None] * len(queries)
+        misses = []
+        for i, query in enumerate(queries):
+            # Fast path: correctly typed IDs never touch the n-gram model
+            for shard in shards:
+                token_idx, tier = shard.exact_lookup(query)
+                if token_idx is not None:
+                    results[i] = shard.success(token_idx, 1.0, tier)
+                    break
+            else:
+                misses.append(i)
+        if not misses:
+            return results
+
+        # Fallback: char n-gram similarity for typos
         try:
-            query_vec = self.vectorizer.transform([query])
-            distances, indices = self.nn_model.kneighbors(query_vec)
-            
-            best_match_index = indices[0][0]
-            confidence = 1 - distances[0][0]
-
-            # Confidence Threshold (0.5 = 50% match)
-            if confidence < 0.5:
-                return {"status": "no_match", "confidence": round(confidence, 2)}
-
-            matched_token = self.search_tokens[best_match_index]
-            seat_info = self.token_map[matched_token]
-
-            return {
-                "status": "success",
-                "match_found": matched_token,
-                "confidence": round(confidence, 2),
-                "seat_details": {
-                    "building": seat_info.get('building', 'Unknown'),
-                    "room": seat_info.get('room', 'Unknown'),
-                    "seat": seat_info.get('seat', 'Unknown')
-                }
-            }
+            texts = [str(queries[i]) for i in misses]
+            k = max(1, suggestions)
+            ranked = [[] for _ in misses]
+            for order, shard in enumerate(shards):
+                similarities, indices = shard.kneighbors(shard.vectorizer.transform(texts), k)
+                for n in range(len(misses)):
+                    ranked[n] += [(-similarities[n, j], order, shard, indices[n, j])
+                                  for j in range(k) if indices[n, j] >= 0]
+
+            for n, i in enumerate(misses):
+                top = sorted(ranked[n], key=lambda c: c[:2])[:k]  # Best first, earlier exam on ties
+                confidence = -top[0][0] if top else 0.0
+                # Confidence Threshold (0.5 = 50% match)
+                if confidence < 0.5:
+                    results[i] = {"status": "no_match", "tier": "fuzzy", "confidence": round(float(confidence), 2)}
+                    if suggestions:
+                        results[i]["suggestions"] = [shard.suggestion(token_idx, -sim) for sim, _, shard, token_idx in top
+                                                     if -sim >= SUGGESTION_MIN_CONFIDENCE]
+                else:
+                    results[i] = shard.success(top[0][3], confidence, "fuzzy")
         except Exception as e:
             print(f"AI Search Error: {e}")
-            return {"status": "error", "message": str(e)}
+            for i in misses:
+                results[i] = {"status": "error", "message": str(e)}
+        return results
+
+    def cached_miss(self, query, scope=None):
+        """Recent failed result for this query (and shard scope) on the current index, if any."""
+        key = (normalize(query), scope, self.data_version)
+        with self._miss_lock:
+            entry = self._misses.get(key)
+            if entry is None: return None
+            if entry[0] < time.monotonic():
+                del self._misses[key]
+                return None
+            return dict(entry[1])
+
+    def remember_miss(self, query, result, scope=None):
+        key = (normalize(query), scope, self.data_version)
+        with self._miss_lock:
+            self._misses[key] = (time.monotonic() + MISS_CACHE_TTL, dict(result))
+            self._misses.move_to_end(key)
+            while len(self._misses) > MISS_CACHE_SIZE:
+                self._misses.popitem(last=False)
+
+    def save(self, directory):
+        index = self._index
+        if index is None or index.data_version is None: return False
+        return index.save(directory, index.data_version)
+
+    def load(self, directory, version=None):
+        index = ShardedIndex.load(directory, version)
+        if index is None: return False
+        self._index = index
+        print(f"✅ AI index loaded from snapshot ({len(index)} keys, version {index.data_version}).")
+        return True
 
 # Singleton instance
-ai_engine = SeatFinderAI()
\ No newline at end of file
+ai_engine = SeatFinderAI()
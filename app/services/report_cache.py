@@ -0,0 +1,135 @@
+import os
+import uuid
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, current_app, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# Report responses kept in memory (per worker), keyed by the seating version.
+# Any committed write to these tables moves the version on, in every worker.
+TRACKED_TABLES = {'seat_assignments', 'students', 'rooms', 'exams'}
+REPORT_CACHE_SIZE = 256  # entries
+REPORT_CACHE_BYTES = 64 * 1024 * 1024
+
+_local_bumps = 0  # Versions written by this worker
+
+def seating_version():
+    """Current seating version, shared by all workers through a small file ('0' before the first write)."""
+    try:
+        with open(current_app.config['SEATING_VERSION_FILE']) as f:
+            return f.read().strip() or '0'
+    except OSError:
+        return '0'
+
+def local_bump_count():
+    """How many times this worker moved the version on (its own writes are seen without re-reading the file)."""
+    return _local_bumps
+
+def bump_seating_version():
+    global _local_bumps
+    path = current_app.config['SEATING_VERSION_FILE']
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    staging = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(staging, 'w') as f:
+        f.write(uuid.uuid4().hex)  # Unique, so concurrent bumps can't land on an old value
+    os.replace(staging, path)
+    _local_bumps += 1
+    report_cache.clear()
+
+# ---------- Write tracking: every session, every write path (ORM, bulk, Core inserts) ----------
+
+def _tracked(objects):
+    return any(getattr(obj, '__tablename__', None) in TRACKED_TABLES for obj in objects)
+
+@event.listens_for(Session, 'after_flush')
+def _note_flush(session, flush_context):
+    # new/dirty/deleted still hold the pre-flush state here
+    if _tracked(session.new) or _tracked(session.dirty) or _tracked(session.deleted):
+        session.info['seating_changed'] = True
+
+@event.listens_for(Session, 'do_orm_execute')
+def _note_statement(orm_execute_state):
+    # Query.delete()/update() and Core table inserts bypass the flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        if getattr(orm_execute_state.statement.table, 'name', None) in TRACKED_TABLES:
+            orm_execute_state.session.info['seating_changed'] = True
+
+@event.listens_for(Session, 'after_commit')
+def _bump_on_commit(session):
+    if session.info.pop('seating_changed', False) and has_app_context():
+        bump_seating_version()
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_on_rollback(session):
+    session.info.pop('seating_changed', None)
+
+# ---------- LRU ----------
+
+class ReportCache:
+    def __init__(self, max_entries=REPORT_CACHE_SIZE, max_bytes=REPORT_CACHE_BYTES):
+        self.max_entries, self.max_bytes = max_entries, max_bytes
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self, version=None):
+        with self._lock:
+            self._entries = OrderedDict()
+            self._bytes = 0
+            self.version = version
+
+    def sync(self, version):
+        """Drops everything cached under another version (written by this or another worker)."""
+        if self.version != version: self.clear(version)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None: self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        """entry: (body bytes, status, mimetype). Evicts least recently used entries past the caps."""
+        size = len(entry[0])
+        if size > self.max_bytes: return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None: self._bytes -= len(old[0])
+            self._entries[key] = entry
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted[0])
+
+    def __len__(self):
+        return len(self._entries)
+
+# Singleton instance
+report_cache = ReportCache()
+
+def cached_report(view):
+    """
+    Serves a GET report view from report_cache, keyed by (endpoint, URL args,
+    query params, seating version). Only complete 200 responses are stored:
+    errors and streamed bodies always run the view.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        version = seating_version()
+        report_cache.sync(version)
+        key = (request.endpoint, tuple(sorted(kwargs.items())), tuple(sorted(request.args.items(multi=True))), version)
+        entry = report_cache.get(key)
+        if entry is not None:
+            body, status, mimetype = entry
+            response = Response(body, status=status, mimetype=mimetype)
+            response.headers['X-Report-Cache'] = 'hit'
+            return response
+
+        response = current_app.make_response(view(*args, **kwargs))
+        if response.status_code == 200 and not response.is_streamed:
+            report_cache.put(key, (response.get_data(), response.status_code, response.mimetype))
+            response.headers['X-Report-Cache'] = 'miss'
+        return response
+    return wrapper
@@ -0,0 +1,221 @@
+import os
+import io
+import re
+import csv
+import json
+import shutil
+import hashlib
+import zipfile
+from collections import deque
+from html import escape
+from concurrent.futures import ProcessPoolExecutor
+
+# Printable exports: one file per hall, rendered in worker processes and cached
+# on disk per seating version, streamed to the client as a single zip
+EXPORT_REPORTS = ('attendance', 'notice-board', 'master-chart')
+EXPORT_FORMATS = ('html', 'csv')
+PARALLEL_MIN_HALLS = 8  # Fewer misses than this render inline (pool start-up costs more)
+
+PAGE_STYLE = """<style>
+body { font-family: 'Times New Roman', serif; }
+.page { padding: 30px; page-break-after: always; }
+.page:last-child { page-break-after: auto; }
+h1 { font-size: 24px; text-align: center; text-decoration: underline; margin: 0 0 5px; }
+h2 { font-size: 18px; text-align: center; margin: 0; }
+table { width: 100%; border-collapse: collapse; }
+table.grid td, table.grid th { border: 1px solid black; padding: 8px 5px; }
+table.meta td { font-weight: bold; padding: 4px 0; }
+.right { text-align: right; }
+.center { text-align: center; }
+</style>"""
+
+def hall_slug(name):
+    """Filesystem and zip safe name for a hall."""
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', str(name)).strip('_') or 'hall'
+
+def _html_document(title, body):
+    return (f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>{escape(title)}</title>"
+            f"{PAGE_STYLE}</head><body>\n{body}\n</body></html>\n")
+
+def _csv_bytes(rows):
+    out = io.StringIO()
+    csv.writer(out).writerows(rows)
+    return out.getvalue().encode('utf-8')
+
+# ---------- Renderers (plain data in, file bytes out: they run in worker processes) ----------
+
+def render_attendance(hall, fmt, options):
+    """hall: {'hall_no', 'pages': attendance_pages output for that hall}"""
+    subjects = options.get('subjects', 3)
+    if fmt == 'csv':
+        rows = [['Hall No.', 'Branch', 'Exam', 'Session', 'Sl. No.', 'Reg No', 'Name']]
+        rows += [[page['hall_no'], page['branch'], page['exam_name'], page['semester'], s['sl'], s['reg_no'] or 'N/A', s['name']]
+                 for page in hall['pages'] for s in page['students']]
+        return _csv_bytes(rows)
+
+    subject_head = ''.join('<th colspan="2">Date: ..........<br>Subject: ..........</th>' for _ in range(subjects))
+    subject_cols = '<th>Book. No.</th><th>Signature</th>' * subjects
+    empty_cells = '<td></td><td></td>' * subjects
+    footer_cells = '<td colspan="2"></td>' * subjects
+    pages = []
+    for page in hall['pages']:
+        students = ''.join(
+            f"<tr><td class=\"center\">{s['sl']}</td><td class=\"center\">{escape(str(s['reg_no'] or 'N/A'))}</td>"
+            f"<td>{escape(str(s['name']))}</td>{empty_cells}</tr>" for s in page['students'])
+        pages.append(f"""<div class="page">
+<h1>ATTENDANCE SHEET</h1><h2>JUT, RANCHI</h2><h2>B.I.T. SINDRI</h2><h2>EXAMINATION SECTION</h2>
+<p class="right"><b>Hall No. {escape(str(page['hall_no']))}</b></p>
+<table class="meta">
+<tr><td>Name of Examination: {escape(str(page['exam_name']))}</td><td class="right">Session: {escape(str(page['semester']))}</td></tr>
+<tr><td>Name of Institute: B.I.T. Sindri</td><td class="right">Centre: B.I.T.</td></tr>
+<tr><td>Course: B. Tech</td><td class="right">Branch: {escape(str(page['branch']))}</td></tr>
+</table>
+<table class="grid">
+<thead><tr><th rowspan="2">Sl.<br>No.</th><th rowspan="2">Reg No</th><th rowspan="2">Name</th>{subject_head}</tr><tr>{subject_cols}</tr></thead>
+<tbody>{students}
+<tr><td colspan="3" class="right"><b>Total No. of Students &rarr;</b></td>{footer_cells}</tr>
+<tr><td colspan="3" class="right"><b>Signature of Invigilator &rarr;</b></td>{footer_cells}</tr>
+</tbody></table>
+</div>""")
+    return _html_document(f"Attendance - {hall['hall_no']}", '\n'.join(pages)).encode('utf-8')
+
+def render_notice_board(hall, fmt, options):
+    """hall: {'hall_no', 'room_total', 'branches': [{'name', 'start', 'end', 'count', 'contiguous'}]}"""
+    if fmt == 'csv':
+        rows = [['Hall No.', 'Branch', 'From', 'To', 'Count', 'Contiguous']]
+        rows += [[hall['hall_no'], b['name'], b['start'], b['end'], b['count'], 'yes' if b['contiguous'] else 'no']
+                 for b in hall['branches']]
+        return _csv_bytes(rows)
+
+    id_label = 'REGISTRATION NO.' if options.get('id_type') == 'reg' else 'ROLL NO.'
+    branches = ''.join(
+        f"<tr><td><b>{escape(str(b['name']))}</b></td><td>{escape(str(b['start']))} To {escape(str(b['end']))}"
+        f"{'' if b['contiguous'] else ' *'}</td><td class=\"right\">{b['count']}</td></tr>" for b in hall['branches'])
+    body = f"""<div class="page">
+<h1>SEATING ARRANGEMENT</h1>
+<h2>{escape(options.get('title', ''))}</h2>
+<h2>{escape(options.get('date', ''))} {escape(options.get('time', ''))}</h2>
+<p class="right"><b>Hall No. {escape(str(hall['hall_no']))}</b></p>
+<table class="grid">
+<thead><tr><th>BRANCH</th><th>{id_label}</th><th>COUNT</th></tr></thead>
+<tbody>{branches}
+<tr><td></td><td class="right"><b>Room Total</b></td><td class="right"><b>{hall['room_total']}</b></td></tr>
+</tbody></table>
+</div>"""
+    return _html_document(f"Notice - {hall['hall_no']}", body).encode('utf-8')
+
+def render_master_chart(chart, fmt, options):
+    """chart: {'halls': [{'hall_no', 'branches': [{'name', 'count'}]}], 'grand_total'}"""
+    if fmt == 'csv':
+        rows = [['Hall No.', 'Branch', 'Count']]
+        rows += [[h['hall_no'], b['name'], b['count']] for h in chart['halls'] for b in h['branches']]
+        rows.append(['', 'Grand Total', chart['grand_total']])
+        return _csv_bytes(rows)
+
+    rows = ''.join(
+        f"<tr><td>{escape(str(h['hall_no']))}</td><td>{escape(str(b['name']))}</td><td class=\"right\">{b['count']}</td></tr>"
+        for h in chart['halls'] for b in h['branches'])
+    body = f"""<div class="page">
+<h1>MASTER SEATING CHART</h1>
+<h2>{escape(options.get('title', ''))}</h2>
+<h2>{escape(options.get('date', ''))} {escape(options.get('time', ''))}</h2>
+<table class="grid">
+<thead><tr><th>HALL NO.</th><th>BRANCH</th><th>COUNT</th></tr></thead>
+<tbody>{rows}
+<tr><td></td><td class="right"><b>Grand Total</b></td><td class="right"><b>{chart['grand_total']}</b></td></tr>
+</tbody></table>
+</div>"""
+    return _html_document('Master Chart', body).encode('utf-8')
+
+RENDERERS = {'attendance': render_attendance, 'notice-board': render_notice_board, 'master-chart': render_master_chart}
+
+def render_hall(job):
+    """Worker entry point: job = (report, fmt, hall data, options)."""
+    report, fmt, hall, options = job
+    return RENDERERS[report](hall, fmt, options)
+
+# ---------- Per-hall cache ----------
+
+def export_cache_dir(directory, exam_id, version):
+    """Cache directory of one exam at one seating version; older versions of the exam are dropped."""
+    version_key = hashlib.sha1(str(version).encode()).hexdigest()[:16]
+    exam_dir = os.path.join(directory, str(exam_id))
+    if os.path.isdir(exam_dir):
+        for entry in os.listdir(exam_dir):
+            if entry != version_key: shutil.rmtree(os.path.join(exam_dir, entry), ignore_errors=True)
+    return os.path.join(exam_dir, version_key)
+
+def _cache_path(cache_dir, report, fmt, options, name):
+    # Options change the rendering (columns, ID type, header): part of the key
+    variant = hashlib.sha1(json.dumps([fmt, options], sort_keys=True).encode()).hexdigest()[:12]
+    name_key = hashlib.sha1(str(name).encode()).hexdigest()[:8]  # Halls whose slugs collide
+    return os.path.join(cache_dir, f"{report}-{variant}", f"{hall_slug(name)}-{name_key}.{fmt}")
+
+def _read_cached(path):
+    try:
+        with open(path, 'rb') as f: return f.read()
+    except OSError:
+        return None
+
+def _write_cached(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    staging = f"{path}.{os.getpid()}.tmp"
+    with open(staging, 'wb') as f: f.write(data)
+    os.replace(staging, path)
+
+# ---------- Zip stream ----------
+
+class _ZipSink:
+    """Write-only file for ZipFile (unseekable: entries use data descriptors); drained as the zip grows."""
+    def __init__(self): self.chunks = []
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+    def flush(self): pass
+    def drain(self):
+        data, self.chunks = b''.join(self.chunks), []
+        return data
+
+def _ordered_map(pool, fn, items, window):
+    """pool.map in input order, keeping at most window items submitted (Executor.map queues the whole input)."""
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= window: yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def export_zip(entries, fmt, cache_dir, load_halls, max_workers=None):
+    """
+    entries: [(report, hall name, options)] in archive order.
+    load_halls(entries) -> iterable of those entries' hall data, in the same order.
+    Yields the zip in chunks. Halls found in the cache are read back and their
+    data is never loaded; the rest are loaded lazily, rendered (in a process pool
+    when there are enough of them, in order, a few halls ahead) and cached for the
+    next export at the same seating version.
+    """
+    paths = [_cache_path(cache_dir, report, fmt, options, name) for report, name, options in entries]
+    hits = [os.path.exists(path) for path in paths]
+    misses = [entry for entry, hit in zip(entries, hits) if not hit]
+    jobs = ((report, fmt, hall, options) for (report, _, options), hall in zip(misses, load_halls(misses)))
+
+    workers = min(len(misses), max_workers or os.cpu_count() or 1)
+    pool = ProcessPoolExecutor(max_workers=workers) if len(misses) >= PARALLEL_MIN_HALLS and workers > 1 else None
+    try:
+        rendered = _ordered_map(pool, render_hall, jobs, workers * 2) if pool else map(render_hall, jobs)
+        sink, counters = _ZipSink(), {}
+        with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for entry, path, hit in zip(entries, paths, hits):
+                report, name, options = entry
+                data = _read_cached(path) if hit else next(rendered)
+                if data is None:  # Pruned by a concurrent export since the check
+                    hall, = load_halls([entry])
+                    data, hit = render_hall((report, fmt, hall, options)), False
+                if not hit: _write_cached(path, data)
+                # Numbered so the archive lists halls in print order
+                counters[report] = counters.get(report, 0) + 1
+                archive.writestr(f"{report}/{counters[report]:03d}-{hall_slug(name)}.{fmt}", data)
+                yield sink.drain()
+        yield sink.drain()  # Central directory
+    finally:
+        if pool: pool.shutdown(cancel_futures=True)
@@ -1,82 +1,505 @@
+import os
+import json
+import time
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from functools import lru_cache
+import numpy as np
 from app import db
-from app.models import SeatAssignment, Room, Student
+from app.models import SeatAssignment, Room, Student, Exam
 
-def generate_multi_branch_seating(exam_id, room_id, student_groups):
+# Room selection: local search over which halls to open, bounded in time
+ROOM_PACKING_BUDGET = 0.2  # seconds
+
+# ==========================================
+# IN-MEMORY PLANNER
+# Works on plain dicts/tuples only (no session, no ORM objects), so a plan
+# can be computed anywhere and written with one bulk insert.
+# ==========================================
+
+def compile_layout_bitmap(rows, cols, layout_matrix):
     """
-    Matrix-Aware Seating Strategy:
-    - Checks room.layout_matrix to see if a seat physically exists.
-    - If layout says '0', skip that seat.
-    - Fills valid seats ('1') vertically using shifted interleaving.
+    Packs a "1,0,1..." row-major layout into a bitmap (1 bit per cell).
+    Returns None when there is no layout: every seat exists.
+    Cells missing from a short layout count as seats; extra cells are ignored.
+    Called when a room is added or updated, so seating never parses the string.
     """
-    print(f"--- 🔵 STARTING MATRIX SEATING FOR ROOM {room_id} ---")
-    
-    room = Room.query.get(room_id)
-    if not room: return {"error": "Room not found"}
+    if not layout_matrix: return None
+    cells = np.ones(rows * cols, dtype=bool)
+    flat = np.array([x.strip() != '0' for x in layout_matrix.split(',')][:rows * cols], dtype=bool)
+    cells[:len(flat)] = flat
+    return np.packbits(cells).tobytes()
 
-    rows = room.total_rows
-    cols = room.total_columns
-    
-    # Parse Layout: Convert "1,0,1..." string to 2D Array
-    # Default to all 1s if no layout exists
-    if room.layout_matrix:
-        flat_list = [int(x) for x in room.layout_matrix.split(',')]
-        # Create 2D grid: layout_grid[row][col]
-        layout_grid = [flat_list[i * cols:(i + 1) * cols] for i in range(rows)]
+@lru_cache(maxsize=1024)
+def seat_coordinates(rows, cols, layout_bitmap):
+    """
+    1-based (row, col) arrays of every existing seat, in fill order:
+    Columns -> Rows (Vertical Filling). Cached per distinct room layout.
+    """
+    if layout_bitmap is None:
+        grid = np.ones((rows, cols), dtype=bool)
     else:
-        layout_grid = [[1 for _ in range(cols)] for _ in range(rows)]
-
-    # --- CRITICAL FIX: SORT BY ROLL NUMBER ---
-    # Previously: key=lambda x: x.registration_number
-    # Now: key=lambda x: x.roll_number (Ensures 2311001 sits before 2311002)
-    sorted_groups = []
-    for g in student_groups:
-        sorted_g = sorted(g, key=lambda x: int(''.join(filter(str.isdigit, str(x.registration_number or '0')))))
-        sorted_groups.append(sorted_g)
-    # -----------------------------------------
-
-    group_counters = [0] * len(sorted_groups)
+        grid = np.unpackbits(np.frombuffer(layout_bitmap, dtype=np.uint8), count=rows * cols).astype(bool).reshape(rows, cols)
+    # Transpose so a flat scan walks each column top to bottom
+    col_idx, row_idx = np.nonzero(grid.T)
+    seat_rows, seat_cols = row_idx + 1, col_idx + 1
+    seat_rows.flags.writeable = False; seat_cols.flags.writeable = False
+    return seat_rows, seat_cols
+
+@lru_cache(maxsize=1024)
+def fill_pattern(rows, cols, layout_bitmap, num_groups):
+    """
+    Ideal branch of every seat, (r - 1 + c - 1) % branches, plus the probe
+    order shifts[v, i] = (v + i) % branches. Cached with the coordinates.
+    """
+    seat_rows, seat_cols = seat_coordinates(rows, cols, layout_bitmap)
+    ideal = (seat_rows - 1 + seat_cols - 1) % num_groups
+    shifts = (np.arange(num_groups)[:, None] + np.arange(num_groups)[None, :]) % num_groups
+    ideal.flags.writeable = False; shifts.flags.writeable = False
+    return ideal, shifts
+
+def branch_queues(students):
+    """
+    One queue of student ids per branch, in the order branches first appear in students.
+    Students arrive already in seating order (Student.sort_key, i.e. numeric
+    registration number, from the DB), so this only splits them; every room
+    consumes from the front of these queues.
+    """
+    grouped = {}
+    for s in students:
+        grouped.setdefault(s['branch'], []).append(s['id'])
+    return [np.array(g, dtype=np.int64) for g in grouped.values()]
+
+def plan_room(room, sorted_groups, group_counters=None):
+    """
+    Matrix-Aware Seating Strategy for one room:
+    - Only seats that exist in the room's layout bitmap are filled.
+    - Fills them vertically using shifted interleaving: the seat at (r, c)
+      wants branch (r - 1 + c - 1) % branches, or the next branch that
+      still has students.
+    room: {'id', 'total_rows', 'total_columns', 'layout_bitmap'}
+    sorted_groups: one sequence of student ids per branch, in seating order
+    group_counters: per-group cursors (next unseated student); advanced in place
+    Returns (student_ids, rows, cols) arrays, in fill order.
+
+    Vectorized in phases: while the set of non-empty branches is fixed, every
+    seat's branch is a table lookup on its ideal branch. A phase ends where
+    the first branch runs dry, so there are at most (branches + 1) phases.
+    """
     num_groups = len(sorted_groups)
+    seat_rows, seat_cols = seat_coordinates(room['total_rows'], room['total_columns'], room.get('layout_bitmap'))
+    empty = np.array([], dtype=np.int64)
+    if not num_groups: return empty, empty, empty
+    if group_counters is None: group_counters = [0] * num_groups
+
+    left = np.array([len(g) - n for g, n in zip(sorted_groups, group_counters)], dtype=np.int64)
+    ideal, shifts = fill_pattern(room['total_rows'], room['total_columns'], room.get('layout_bitmap'), num_groups)
+    n_seats = min(len(ideal), int(left.sum()))
+    seat_groups = np.empty(n_seats, dtype=np.int64)
+
+    start = 0
+    while start < n_seats:
+        redirect = shifts[np.arange(num_groups), np.argmax(left[shifts] > 0, axis=1)]
+        target = redirect[ideal[start:n_seats]]
+        # Phase length: up to and including the seat that empties the first branch
+        taken = np.cumsum(target[:, None] == np.arange(num_groups)[None, :], axis=0)
+        dry = np.flatnonzero(((taken == left[None, :]) & (left > 0)[None, :]).any(axis=1))
+        length = int(dry[0]) + 1 if len(dry) else len(target)
+        seat_groups[start:start + length] = target[:length]
+        left -= np.bincount(target[:length], minlength=num_groups)
+        start += length
+
+    # Seats grouped by branch (stable: fill order within a branch) take that branch's next students
+    student_ids = np.empty(n_seats, dtype=np.int64)
+    taken = np.bincount(seat_groups, minlength=num_groups)
+    student_ids[np.argsort(seat_groups, kind='stable')] = np.concatenate(
+        [np.asarray(sorted_groups[g][group_counters[g]:group_counters[g] + taken[g]], dtype=np.int64)
+         for g in range(num_groups)])
+    for g in range(num_groups):
+        group_counters[g] += int(taken[g])
+    return student_ids, seat_rows[:n_seats], seat_cols[:n_seats]
+
+def room_capacity(room):
+    """Real capacity: seats that exist in the layout (Room.capacity can be stale)."""
+    return len(seat_coordinates(room['total_rows'], room['total_columns'], room.get('layout_bitmap'))[0])
+
+def _fill_rooms(rooms, queues, max_branches):
+    """
+    Core fill loop: rooms in order, each taking the first max_branches
+    non-empty branch queues (0 = all) through per-queue cursors.
+    Yields (room, student_ids, rows, cols) per room until the queues run dry.
+    """
+    cursors = [0] * len(queues)
+    open_queues = [q for q in range(len(queues)) if len(queues[q])]
+
+    for room in rooms:
+        # Drop exhausted branches (each is removed once)
+        open_queues = [q for q in open_queues if cursors[q] < len(queues[q])]
+        if not open_queues: return
+
+        # APPLY THE LIMIT PER ROOM: only the first N branches still available
+        active = open_queues[:max_branches] if max_branches > 0 else open_queues
+        active_cursors = [cursors[q] for q in active]
+
+        student_ids, seat_rows, seat_cols = plan_room(room, [queues[q] for q in active], active_cursors)
+        for q, n in zip(active, active_cursors):
+            cursors[q] = n
+        yield room, student_ids, seat_rows, seat_cols
+
+def simulate_fill(rooms, queue_sizes, max_branches=0):
+    """Students each room would get if filled in this order (counts only, no ids)."""
+    if max_branches <= 0:
+        # No branch limit: every room takes min(capacity, students left)
+        remaining, seated = sum(queue_sizes), []
+        for room in rooms:
+            n = min(room_capacity(room), remaining)
+            seated.append(n); remaining -= n
+        return seated
+    filled = {room['id']: len(ids) for room, ids, _, _ in
+              _fill_rooms(rooms, [np.zeros(n, dtype=np.int64) for n in queue_sizes], max_branches)}
+    return [filled.get(room['id'], 0) for room in rooms]
+
+def select_rooms(rooms, students, max_branches=0, budget=ROOM_PACKING_BUDGET):
+    """
+    Room-selection stage for multi-room runs: which halls to open so every
+    student who can be seated is, in as few rooms as possible, with as few
+    empty seats as possible (layout-derived capacity, max_branches respected).
+    Starts from the old rule (largest first, keep the rooms it uses) and
+    improves it by local search until no move helps or the budget runs out:
+    - close an open room if the rest still seat as many students
+    - swap an open room for a smaller closed one, same condition
+    Returns the chosen rooms in fill order (largest first).
+    """
+    if len(rooms) <= 1: return list(rooms)
+    deadline = time.perf_counter() + budget
+    sizes = [len(q) for q in branch_queues(students)]
+    cap = {room['id']: room_capacity(room) for room in rooms}
+    rank = {room['id']: n for n, room in enumerate(sorted(rooms, key=lambda r: -cap[r['id']]))}
+
+    def evaluate(candidate):
+        candidate = sorted(candidate, key=lambda r: rank[r['id']])
+        seated = simulate_fill(candidate, sizes, max_branches)
+        used = [(room, n) for room, n in zip(candidate, seated) if n]
+        score = (sum(seated), -len(used), -sum(cap[room['id']] - n for room, n in used))
+        return score, [room for room, _ in used]
+
+    def moves(chosen):
+        # Lazily, so the budget also bounds building the (open x closed) swap list
+        open_ids = {room['id'] for room in chosen}
+        closed = sorted((r for r in rooms if r['id'] not in open_ids), key=lambda r: cap[r['id']])
+        for x in sorted(chosen, key=lambda r: cap[r['id']]):
+            if time.perf_counter() >= deadline: return
+            yield [r for r in chosen if r is not x]
+        for x in sorted(chosen, key=lambda r: -cap[r['id']]):
+            for y in closed:
+                if cap[y['id']] >= cap[x['id']]: break  # closed is smallest first
+                if time.perf_counter() >= deadline: return
+                yield [r for r in chosen if r is not x] + [y]
+
+    best, chosen = evaluate(rooms)
+    while time.perf_counter() < deadline:
+        for candidate in moves(chosen):
+            score, used = evaluate(candidate)
+            if score > best:
+                best, chosen = score, used
+                break
+        else:
+            break  # Local optimum (or out of time)
+    return sorted(chosen, key=lambda r: rank[r['id']])
+
+def plan_exam_seating(rooms, students, max_branches=0, progress=None, pack=True):
+    """
+    Whole-exam plan across the target rooms, entirely in memory.
+    rooms: room dicts (see plan_room); with pack, select_rooms picks which
+           to open first, otherwise they are filled first to last
+    students: student dicts ({'id', 'branch'}), already ordered by
+              (branch, sort_key, roll number); branches are taken in that order
+    max_branches: at most this many branches per room (0 = no limit)
+    progress: optional callback(rooms_done, students_seated), called after each room
+    Returns (assignments, allocated per room id) where assignments are
+    (student_id, room_id, row, col) tuples.
+    Linear in students + seats: each branch queue is sorted once and rooms
+    consume it through a cursor; nothing is rescanned per room.
+    """
+    if pack: rooms = select_rooms(rooms, students, max_branches)
+    assignments, per_room = [], {}
+    for room, student_ids, seat_rows, seat_cols in _fill_rooms(rooms, branch_queues(students), max_branches):
+        assignments += zip(student_ids.tolist(), [room['id']] * len(student_ids), seat_rows.tolist(), seat_cols.tolist())
+        per_room[room['id']] = len(student_ids)
+        if not len(student_ids):
+            print(f"Room {room.get('name', room['id'])}: Full or no seats")
+        if progress: progress(len(per_room), len(assignments))
+
+    return assignments, per_room
+
+def seating_report(rooms, per_room):
+    """Rooms a plan opened and the seats it leaves empty in them."""
+    used = [room for room in rooms if per_room.get(room['id'])]
+    return {
+        "rooms_used": [{"room_id": room['id'], "name": room.get('name'), "seats": room_capacity(room),
+                        "allocated": per_room[room['id']]} for room in used],
+        "leftover_seats": sum(room_capacity(room) - per_room[room['id']] for room in used)
+    }
+
+def free_seat_bitmap(room, taken):
+    """The room's layout bitmap with the seats in taken ({(row, col), ...}) switched off."""
+    rows, cols = room['total_rows'], room['total_columns']
+    seat_rows, seat_cols = seat_coordinates(rows, cols, room.get('layout_bitmap'))
+    grid = np.zeros((rows, cols), dtype=bool)
+    grid[seat_rows - 1, seat_cols - 1] = True
+    if taken:
+        r, c = np.array(list(taken)).T
+        grid[r - 1, c - 1] = False
+    return np.packbits(grid.ravel()).tobytes()
+
+def plan_incremental(rooms, occupied, students, max_branches=0):
+    """
+    Places only new students into the free seats of an existing plan.
+    rooms: room dicts in fill order
+    occupied: {room_id: {(row, col): branch}} for seats that stay as they are
+    students: the new students ({'id', 'branch'}), in (branch, sort_key) order
+    Each room interleaves its own branches (plus new ones, up to max_branches)
+    with the same shifted rule as plan_room, over its free seats only.
+    Returns (assignments, allocated per room id).
+    """
+    assignments, per_room = [], {}
+    queues = {}
+    for s in students:
+        queues.setdefault(s['branch'], []).append(s['id'])
+    cursors = dict.fromkeys(queues, 0)
+    branches = sorted(set(queues) | {b for taken in occupied.values() for b in taken.values()})
+    rank = {b: n for n, b in enumerate(branches)}
+
+    for room in rooms:
+        pending = [b for b in queues if cursors[b] < len(queues[b])]
+        if not pending: break
+        taken = occupied.get(room['id'], {})
+        allowed = sorted(set(taken.values()), key=rank.get)
+        for b in pending:
+            if max_branches > 0 and len(allowed) >= max_branches: break
+            if b not in allowed: allowed.append(b)
+        allowed.sort(key=rank.get)
+        if not any(b in pending for b in allowed): continue
+
+        free_room = dict(room, layout_bitmap=free_seat_bitmap(room, taken))
+        counters = [cursors.get(b, 0) for b in allowed]
+        student_ids, seat_rows, seat_cols = plan_room(free_room, [queues.get(b, []) for b in allowed], counters)
+        for b, n in zip(allowed, counters):
+            if b in cursors: cursors[b] = n
+        assignments += zip(student_ids.tolist(), [room['id']] * len(student_ids), seat_rows.tolist(), seat_cols.tolist())
+        per_room[room['id']] = len(student_ids)
+
+    return assignments, per_room
+
+def plan_timetable_day(slots):
+    """
+    Plans every exam of one date, in request order.
+    slots: [(key, time_slot, rooms, students, max_branches), ...]
+    Exams in the same time slot share the date's rooms: a room an earlier
+    one filled is skipped by the later ones.
+    Returns [(key, assignments, error), ...]
+    """
+    busy, planned = {}, []
+    for key, time_slot, rooms, students, max_branches in slots:
+        taken = busy.setdefault(time_slot, set())
+        try:
+            assignments, per_room = plan_exam_seating([r for r in rooms if r['id'] not in taken], students, max_branches)
+        except Exception as e:
+            planned.append((key, None, str(e)))
+            continue
+        taken.update(room_id for room_id, n in per_room.items() if n)
+        planned.append((key, assignments, None))
+    return planned
+
+def plan_timetable(days, max_workers=None):
+    """
+    days: {date: slots for plan_timetable_day}
+    Dates share no rooms, so each is planned in its own worker process.
+    Yields (date, plan) as each date finishes; a single date is planned inline.
+    """
+    if len(days) <= 1:
+        for day, slots in days.items():
+            yield day, plan_timetable_day(slots)
+        return
+    workers = min(len(days), max_workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(plan_timetable_day, slots): day for day, slots in days.items()}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+def save_seating_plan(exam_id, assignments):
+    """
+    Writes a plan with one executemany INSERT (Core table insert: no ORM
+    bulk bookkeeping per row). Does not commit: the caller owns the
+    transaction (e.g. delete old seats + insert + commit together).
+    """
+    if not assignments: return 0
+    db.session.execute(SeatAssignment.__table__.insert(), [
+        {'student_id': student_id, 'exam_id': exam_id, 'room_id': room_id,
+         'row_num': r, 'col_num': c, 'seat_label': f"R{r}-C{c}"}
+        for student_id, room_id, r, c in assignments
+    ])
+    return len(assignments)
+
+def room_plan_data(room):
+    bitmap = room.layout_bitmap
+    if bitmap is None and room.layout_matrix:
+        # Room saved before bitmaps existed and not backfilled yet
+        bitmap = compile_layout_bitmap(room.total_rows, room.total_columns, room.layout_matrix)
+    return {'id': room.id, 'name': room.name, 'total_rows': room.total_rows,
+            'total_columns': room.total_columns, 'layout_bitmap': bitmap}
+
+def load_seating_inputs(data, create_exam=True):
+    """
+    Everything one seating request needs, as plain data for the planner.
+    Creates (flushes) the exam if it is new, unless create_exam is False
+    (then exam is None for an exam that does not exist yet).
+    Returns (exam, rooms, students, max_branches, error).
+    """
+    if data['branches'].strip().upper() == 'ALL':
+        unique_branches = db.session.query(Student.branch).distinct().all()
+        branch_names = [b[0] for b in unique_branches] 
+    else:
+        branch_names = [b.strip() for b in data['branches'].split(',')]
+
+    target_session = data.get('target_session', '').strip()
+
+    # Plain columns only, pre-sorted by the DB (session, branch, sort_key index):
+    # branch, then numeric registration number, then roll number
+    query = db.session.query(Student.id, Student.branch).filter(Student.branch.in_(branch_names))
+    if target_session:
+        query = query.filter(Student.session == target_session)
+    query = query.order_by(Student.branch, Student.sort_key, Student.roll_number)
+    students = [{'id': sid, 'branch': branch} for sid, branch in query]
     
-    assignments = []
-    
-    # Loop Columns -> Rows (Vertical Filling)
-    for c in range(1, cols + 1):          
-        col_start_offset = (c - 1)
-        
-        for r in range(1, rows + 1):
-            
-            # --- CHECK: DOES THIS SEAT EXIST? ---
-            # Grid is 0-indexed, database is 1-indexed
-            if layout_grid[r-1][c-1] == 0:
-                # print(f"Skipping R{r}-C{c} (Space/Pillar)")
-                continue # Skip this loop iteration
-            # ------------------------------------
-
-            student_to_seat = None
-            ideal_branch_idx = ((r - 1) + col_start_offset) % num_groups
-            
-            for i in range(num_groups):
-                try_idx = (ideal_branch_idx + i) % num_groups
-                if group_counters[try_idx] < len(sorted_groups[try_idx]):
-                    student_to_seat = sorted_groups[try_idx][group_counters[try_idx]]
-                    group_counters[try_idx] += 1
-                    break
-            
-            if student_to_seat:
-                new_seat = SeatAssignment(
-                    student_id=student_to_seat.id, exam_id=exam_id, room_id=room.id,
-                    row_num=r, col_num=c, seat_label=f"R{r}-C{c}"
-                )
-                assignments.append(new_seat)
-
-    try:
-        # Note: We do NOT delete here anymore because routes.py handles the cleanup 
-        # before calling this function for multiple rooms.
-        # But for safety in single-run contexts, we append.
-        
-        db.session.add_all(assignments)
-        db.session.commit()
-        return {"success": True, "allocated": len(assignments)}
-    except Exception as e:
-        db.session.rollback()
-        return {"error": str(e)}
\ No newline at end of file
+    if not students:
+        return None, None, None, 0, "No students found."
+
+    exam_date = datetime.strptime(data['date'], '%Y-%m-%d').date()
+    raw_name = data['exam_name']
+    sem = data.get('semester', '')
+    final_exam_name = f"{raw_name} - {sem}" if sem else raw_name
+    # 0 means no limit on branches per room
+    max_branches = int(data.get('max_branches', 0))
+
+    if str(data['room_id']).lower() == 'all':
+        target_rooms = Room.query.order_by(Room.capacity.desc()).all()
+    else:
+        target_rooms = [r for r in [Room.query.get(int(data['room_id']))] if r]
+
+    if not target_rooms: return None, None, students, 0, "No rooms found."
+
+    exam = Exam.query.filter_by(name=final_exam_name, date=exam_date, time_slot=data['time']).first()
+    if not exam and create_exam:
+        exam = Exam(name=final_exam_name, subject_code="MIXED", date=exam_date, time_slot=data['time'])
+        db.session.add(exam); db.session.flush()
+
+    return exam, [room_plan_data(r) for r in target_rooms], students, max_branches, None
+
+def plan_summary(rooms, students, assignments):
+    """
+    What a plan would do, for previews: allocation counts, each room's
+    branch mix and the students left over (per branch).
+    """
+    branch_of = {s['id']: s['branch'] for s in students}
+    per_room = {room['id']: {} for room in rooms}
+    for student_id, room_id, _, _ in assignments:
+        mix = per_room[room_id]
+        mix[branch_of[student_id]] = mix.get(branch_of[student_id], 0) + 1
+
+    seated = {student_id for student_id, _, _, _ in assignments}
+    leftover = {}
+    for s in students:
+        if s['id'] not in seated:
+            leftover[s['branch']] = leftover.get(s['branch'], 0) + 1
+
+    return {
+        "allocated": len(assignments),
+        "remaining": len(students) - len(assignments),
+        "rooms": [{"room_id": room['id'], "name": room.get('name'), "seats": room_capacity(room),
+                   "allocated": sum(per_room[room['id']].values()), "branches": per_room[room['id']]}
+                  for room in rooms if per_room[room['id']]],
+        "leftover_seats": sum(room_capacity(room) - sum(per_room[room['id']].values())
+                              for room in rooms if per_room[room['id']]),
+        "leftover_by_branch": leftover
+    }
+
+def inputs_fingerprint(rooms, students, max_branches):
+    """Changes whenever anything the planner reads changes: students, their order, rooms, layouts."""
+    payload = [max_branches,
+               [(s['id'], s['branch']) for s in students],
+               [(r['id'], r['total_rows'], r['total_columns'], (r.get('layout_bitmap') or b'').hex()) for r in rooms]]
+    return hashlib.sha1(json.dumps(payload).encode()).hexdigest()
+
+def force_requested(data):
+    """Optional force=true: re-plan even when the stored plan matches the inputs."""
+    return str(data.get('force', '')).strip().lower() in ('1', 'true', 'yes')
+
+def stored_plan_size(exam, plan_hash, force=False):
+    """
+    Seats the exam already holds if its stored plan was built from these exact
+    inputs (re-planning would rewrite the same rows). None = plan it.
+    """
+    if force or exam is None or exam.plan_hash is None or exam.plan_hash != plan_hash: return None
+    return SeatAssignment.query.filter_by(exam_id=exam.id).count()
+
+def commit_seating_plan(exam_id, assignments, plan_hash=None):
+    """
+    One transaction per exam: delete old seats + one bulk insert + commit.
+    plan_hash: inputs_fingerprint the plan was built from (None when the plan
+    is not a pure function of the exam's inputs, e.g. timetable room sharing).
+    """
+    SeatAssignment.query.filter_by(exam_id=exam_id).delete()
+    allocated = save_seating_plan(exam_id, assignments)
+    db.session.get(Exam, exam_id).plan_hash = plan_hash
+    db.session.commit()
+    return allocated
+
+def reseat_incremental(data):
+    """
+    Brings an exam's seating in line with its request without touching
+    seats that are still valid: withdrawn students (no longer selected by
+    the request) lose their seats, new ones fill free seats. Writes scale
+    with the change; existing rows are never rewritten.
+    Returns (result dict, error).
+    """
+    exam, rooms, students, max_branches, error = load_seating_inputs(data)
+    if error: return None, error
+
+    target = {s['id'] for s in students}
+    current = (db.session.query(SeatAssignment.id, SeatAssignment.student_id, SeatAssignment.room_id,
+                                SeatAssignment.row_num, SeatAssignment.col_num, Student.branch)
+               .join(Student, SeatAssignment.student_id == Student.id)
+               .filter(SeatAssignment.exam_id == exam.id).all())
+
+    withdrawn, seated, occupied = [], set(), {}
+    for seat_id, student_id, room_id, r, c, branch in current:
+        if student_id in target and student_id not in seated:
+            seated.add(student_id)
+            occupied.setdefault(room_id, {})[(r, c)] = branch
+        else:
+            withdrawn.append(seat_id)
+    # Seats whose student was deleted outright (no join match) are withdrawn too
+    orphans = (db.session.query(SeatAssignment.id)
+               .outerjoin(Student, SeatAssignment.student_id == Student.id)
+               .filter(SeatAssignment.exam_id == exam.id, Student.id.is_(None)).all())
+    withdrawn += [seat_id for seat_id, in orphans]
+
+    new_students = [s for s in students if s['id'] not in seated]
+    # Top up rooms already open for this exam before opening new ones
+    rooms = sorted(rooms, key=lambda r: r['id'] not in occupied)
+    assignments, _ = plan_incremental(rooms, occupied, new_students, max_branches)
+
+    for i in range(0, len(withdrawn), 500):
+        SeatAssignment.query.filter(SeatAssignment.id.in_(withdrawn[i:i + 500])).delete(synchronize_session=False)
+    added = save_seating_plan(exam.id, assignments)
+    if withdrawn or added: exam.plan_hash = None  # No longer what a full run would produce
+    db.session.commit()
+    return {
+        "exam_id": exam.id,
+        "added": added,
+        "removed": len(withdrawn),
+        "kept": len(seated),
+        "unplaced": len(new_students) - added
+    }, None
@@ -0,0 +1,160 @@
+import os
+import json
+import time
+import uuid
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from app.models import SeatingJob
+from app.services.seating_algo import (load_seating_inputs, plan_exam_seating, commit_seating_plan, seating_report,
+                                       inputs_fingerprint, force_requested, stored_plan_size)
+
+# One background worker: seating runs off the request threads, one job at a time
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='seating-job')
+PROGRESS_INTERVAL = 0.5  # seconds between progress writes to the job row
+ACTIVE_STATUSES = ('queued', 'running', 'writing')
+
+# Liveness: a job whose owner stopped beating this long ago died with its process
+HEARTBEAT_INTERVAL = 15  # seconds
+JOB_STALE_AFTER = 120  # seconds
+_heartbeat = None
+_heartbeat_lock = threading.Lock()
+
+def job_owner():
+    # Read per call: a pre-forking server changes the pid after import
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def _beat(app, owner):
+    """Refreshes heartbeat_at of this process's active jobs; exits once it has none."""
+    global _heartbeat
+    with app.app_context():
+        while True:
+            time.sleep(HEARTBEAT_INTERVAL)
+            # Own connection: the job's session may sit in its long write transaction
+            with _heartbeat_lock:
+                try:
+                    with db.engine.begin() as conn:
+                        beating = conn.execute(
+                            SeatingJob.__table__.update()
+                            .where(SeatingJob.owner == owner, SeatingJob.status.in_(ACTIVE_STATUSES))
+                            .values(heartbeat_at=datetime.utcnow())).rowcount
+                except SQLAlchemyError as e:
+                    print(f"⚠️ Seating job heartbeat failed: {e}")
+                    continue
+                if not beating:
+                    _heartbeat = None
+                    return
+
+def _ensure_heartbeat(app):
+    global _heartbeat
+    with _heartbeat_lock:
+        if _heartbeat is None:
+            _heartbeat = threading.Thread(target=_beat, args=(app, job_owner()), daemon=True,
+                                          name='seating-job-heartbeat')
+            _heartbeat.start()
+
+def submit_seating_job(app, data):
+    """Records the request as a queued job and hands it to the worker. Returns the job."""
+    job = SeatingJob(id=uuid.uuid4().hex, request_data=json.dumps(data),
+                     owner=job_owner(), heartbeat_at=datetime.utcnow())
+    db.session.add(job); db.session.commit()
+    _ensure_heartbeat(app)
+    _executor.submit(run_seating_job, app, job.id)
+    return job
+
+def run_seating_job(app, job_id):
+    """Worker body: the same load -> plan -> single-transaction write as /admin/generate-seating."""
+    with app.app_context():
+        job = SeatingJob.query.get(job_id)
+        if job is None: return
+        job.status, job.started_at = 'running', datetime.utcnow()
+        job.heartbeat_at = job.started_at
+        db.session.commit()
+        print(f"--- 🔵 SEATING JOB {job_id} STARTED ---")
+
+        try:
+            data = json.loads(job.request_data)
+            exam, rooms, students, max_branches, error = load_seating_inputs(data)
+            if error: raise ValueError(error)
+            exam_id = exam.id
+            job.exam_id, job.rooms_total, job.students_total = exam_id, len(rooms), len(students)
+            db.session.commit()  # Also publishes a newly created exam
+
+            plan_hash = inputs_fingerprint(rooms, students, max_branches)
+            stored = stored_plan_size(exam, plan_hash, force_requested(data))
+            if stored is not None:
+                job.status, job.finished_at = 'done', datetime.utcnow()
+                job.rooms_done, job.students_seated = job.rooms_total, stored
+                job.message = f"Seating unchanged: {stored} students already allocated from the same inputs."
+                db.session.commit()
+                print(f"✅ SEATING JOB {job_id} DONE: {job.message}")
+                return
+
+            last_write = [time.monotonic()]
+            def progress(rooms_done, students_seated):
+                if time.monotonic() - last_write[0] < PROGRESS_INTERVAL: return
+                job.rooms_done, job.students_seated = rooms_done, students_seated
+                db.session.commit()
+                last_write[0] = time.monotonic()
+
+            assignments, per_room = plan_exam_seating(rooms, students, max_branches, progress)
+            # The delete + bulk insert is the slow phase: show the finished plan while it runs
+            job.status, job.rooms_done, job.students_seated = 'writing', len(per_room), len(assignments)
+            job.message = f"Writing {len(assignments)} seats..."
+            db.session.commit()
+            allocated = commit_seating_plan(exam_id, assignments, plan_hash)
+            report = seating_report(rooms, per_room)
+
+            job.status, job.finished_at = 'done', datetime.utcnow()
+            job.rooms_done, job.students_seated = job.rooms_total, allocated
+            job.message = (f"Allocated {allocated} students in {len(report['rooms_used'])} rooms "
+                           f"({report['leftover_seats']} seats left empty). {job.students_total - allocated} remaining.")
+            db.session.commit()
+            print(f"✅ SEATING JOB {job_id} DONE: {job.message}")
+        except Exception as e:
+            db.session.rollback()
+            job = SeatingJob.query.get(job_id)
+            job.status, job.finished_at, job.message = 'failed', datetime.utcnow(), str(e)
+            db.session.commit()
+            print(f"❌ SEATING JOB {job_id} FAILED: {e}")
+
+def job_is_stale(job):
+    """Active, but its owner has not beaten for JOB_STALE_AFTER (process gone)."""
+    beat = job.heartbeat_at or job.created_at
+    return job.status in ACTIVE_STATUSES and (beat is None or datetime.utcnow() - beat > timedelta(seconds=JOB_STALE_AFTER))
+
+def fail_interrupted_jobs():
+    """
+    Marks active jobs whose process is gone as failed, so they are not polled
+    forever. Jobs of live processes (any worker, any host) keep beating and are left alone.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=JOB_STALE_AFTER)
+    try:
+        stale = SeatingJob.query.filter(
+            SeatingJob.status.in_(ACTIVE_STATUSES),
+            db.func.coalesce(SeatingJob.heartbeat_at, SeatingJob.created_at) < cutoff
+        ).update({'status': 'failed', 'finished_at': datetime.utcnow(),
+                  'message': 'Interrupted: the server process running it stopped. Please run it again.'},
+                 synchronize_session=False)
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()  # Table not created yet (fresh database, pending migration)
+        return 0
+    if stale: print(f"⚠️ Marked {stale} interrupted seating job(s) as failed")
+    return stale
+
+def job_progress(job):
+    end = job.finished_at or datetime.utcnow()
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "exam_id": job.exam_id,
+        "rooms_done": job.rooms_done, "rooms_total": job.rooms_total,
+        "students_seated": job.students_seated, "students_total": job.students_total,
+        "elapsed_ms": round((end - job.started_at).total_seconds() * 1000, 1) if job.started_at else 0,
+        "message": job.message
+    }
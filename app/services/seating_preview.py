@@ -0,0 +1,54 @@
+import os
+import json
+import time
+import uuid
+
+# Dry-run plans wait on disk (shared by every app worker) until committed or expired
+PREVIEW_TTL = 3600  # seconds
+
+def _preview_path(directory, token):
+    # Tokens are uuid4 hex: anything else never names a file
+    if not token or not str(token).isalnum(): return None
+    return os.path.join(directory, f"{token}.json")
+
+def save_preview(directory, data, fingerprint, assignments):
+    """Stores a computed plan and returns its token."""
+    os.makedirs(directory, exist_ok=True)
+    prune_previews(directory)
+    token = uuid.uuid4().hex
+    path = _preview_path(directory, token)
+    staging = f"{path}.tmp"
+    with open(staging, 'w') as f:
+        json.dump({'request': data, 'fingerprint': fingerprint, 'created': time.time(),
+                   'assignments': assignments}, f)
+    os.replace(staging, path)
+    return token
+
+def load_preview(directory, token):
+    """The stored preview, or None if unknown or expired."""
+    path = _preview_path(directory, token)
+    try:
+        with open(path) as f:
+            preview = json.load(f)
+    except (TypeError, OSError, ValueError):
+        return None
+    if preview['created'] + PREVIEW_TTL < time.time():
+        discard_preview(directory, token)
+        return None
+    preview['assignments'] = [tuple(a) for a in preview['assignments']]
+    return preview
+
+def discard_preview(directory, token):
+    path = _preview_path(directory, token)
+    if path and os.path.exists(path):
+        try: os.remove(path)
+        except OSError: pass
+
+def prune_previews(directory):
+    cutoff = time.time() - PREVIEW_TTL
+    for entry in os.listdir(directory):
+        path = os.path.join(directory, entry)
+        try:
+            if os.path.getmtime(path) < cutoff: os.remove(path)
+        except OSError:
+            pass  # Removed by another worker
@@ -0,0 +1,197 @@
+# bench_lookup.py
+# Compares the seat-lookup engine with the old sklearn path
+# (TfidfVectorizer + NearestNeighbors(metric='cosine') brute-force KNN).
+#
+#   python bench_lookup.py                       -> 10k, 100k, 1M keys
+#   python bench_lookup.py --sizes 10000 --queries 100
+#   python bench_lookup.py --stress 10           -> lookups racing retraining
+#   python bench_lookup.py --memory 100000       -> token/record store footprint
+import argparse
+import gc
+import random
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.neighbors import NearestNeighbors
+
+from app.services.ai_engine import SeatFinderAI, SeatIndex
+
+def make_records(n, seed=7):
+    rng = random.Random(seed)
+    records = []
+    for i in range(n):
+        reg = f"2303{rng.randint(0, 99):02d}{i:07d}"
+        records.append({'registration_number': reg, 'roll_number': None,
+                        'seat': f"R{i % 10 + 1}-C{i % 6 + 1}", 'room': f"LH-{i % 80:02d}", 'building': 'Main'})
+    return records
+
+def make_typos(records, count, seed=11):
+    """One substitution, deletion or transposition per query (so the exact tier misses)."""
+    rng = random.Random(seed)
+    queries = []
+    for rec in rng.sample(records, count):
+        s = list(rec['registration_number'])
+        pos = rng.randrange(1, len(s) - 1)
+        kind = rng.choice('sdt')
+        if kind == 's': s[pos] = str((int(s[pos]) + 1) % 10)
+        elif kind == 'd': del s[pos]
+        else: s[pos], s[pos + 1] = s[pos + 1], s[pos]
+        queries.append(''.join(s))
+    return queries
+
+def run(size, n_queries):
+    records = make_records(size)
+    tokens = [r['registration_number'] for r in records]
+    queries = make_typos(records, n_queries)
+
+    # --- Old path: sklearn brute-force cosine KNN ---
+    t = time.perf_counter()
+    vectorizer = TfidfVectorizer(analyzer='char', ngram_range=(2, 3))
+    matrix = vectorizer.fit_transform(tokens)
+    nn_model = NearestNeighbors(n_neighbors=1, metric='cosine').fit(matrix)
+    sk_build = time.perf_counter() - t
+
+    sk_times, sk_sims = [], []
+    for q in queries:
+        t = time.perf_counter()
+        dist, _ = nn_model.kneighbors(vectorizer.transform([q]))
+        sk_times.append(time.perf_counter() - t)
+        sk_sims.append(1 - dist[0][0])
+
+    # --- New path: trigram inverted index ---
+    engine = SeatFinderAI()
+    t = time.perf_counter()
+    engine.train(records)
+    tg_build = time.perf_counter() - t
+
+    shard = engine.index.shards[0]  # Synthetic records carry no exam: one shard
+    tg_times, tg_sims = [], []
+    for q in queries:
+        t = time.perf_counter()
+        sims, _ = shard.kneighbors(shard.vectorizer.transform([q]))
+        tg_times.append(time.perf_counter() - t)
+        tg_sims.append(sims[0][0])
+
+    # "Same or better": trigram best similarity is never below sklearn's best
+    # (within float32 rounding: the engine stores its matrix in single precision)
+    agree = sum(1 for a, b in zip(sk_sims, tg_sims) if b >= a - 1e-5)
+    print(f"{size:>9,} keys | build sklearn {sk_build:6.2f}s  trigram {tg_build:6.2f}s | "
+          f"p50 sklearn {np.median(sk_times) * 1000:8.2f} ms  trigram {np.median(tg_times) * 1000:7.2f} ms | "
+          f"match quality {agree}/{len(queries)}")
+
+def stress(seconds, size=5000, readers=8):
+    """
+    Hammers find_seat from several threads while the main thread retrains
+    over and over. Every generation shuffles the record order and encodes
+    the owner into the seat label, so a lookup that mixed tokens from one
+    build with records from another would return a foreign seat.
+    """
+    engine = SeatFinderAI()
+    base = make_records(size)
+    keys = [r['registration_number'] for r in base]
+
+    def generation(g):
+        rng = random.Random(g)
+        records = [dict(r, seat=f"{r['registration_number']}@{g}") for r in base]
+        rng.shuffle(records)
+        return records
+
+    engine.train(generation(0))
+    stop = threading.Event()
+    counts = {'lookups': 0, 'torn': 0, 'errors': 0}
+    lock = threading.Lock()
+
+    def reader(seed):
+        rng = random.Random(seed)
+        lookups = torn = errors = 0
+        while not stop.is_set():
+            key = rng.choice(keys)
+            query = key if rng.random() < 0.7 else key[:-1]  # mix exact and fuzzy
+            result = engine.find_seat(query)
+            lookups += 1
+            if result['status'] == 'success':
+                owner = result['seat_details']['seat'].split('@')[0]
+                if owner != result['match_found']: torn += 1
+            elif result['status'] == 'error':
+                errors += 1
+        with lock:
+            counts['lookups'] += lookups; counts['torn'] += torn; counts['errors'] += errors
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    for t in threads: t.start()
+    retrains, g, deadline = 0, 0, time.time() + seconds
+    while time.time() < deadline:
+        g += 1
+        engine.train(generation(g))
+        retrains += 1
+    stop.set()
+    for t in threads: t.join()
+
+    print(f"stress: {counts['lookups']:,} lookups across {retrains} retrains | "
+          f"torn results {counts['torn']} | errors {counts['errors']}")
+    return counts['torn'] == 0 and counts['errors'] == 0
+
+def student_rows(n):
+    """Rows shaped like perform_training's: fresh strings per row, as a DB cursor returns them."""
+    for i in range(n):
+        yield {'exam_id': 1, 'exam_date': '2025-12-01', 'student_id': i + 1,
+               'registration_number': f"2303048{i:06d}", 'roll_number': f"CSE{i:07d}",
+               'name': f"Student {i:06d}",
+               'seat': f"R{i % 10 + 1}-C{i // 10 % 6 + 1}", 'room': f"Lecture Hall {i // 60 % 80:02d}",
+               'building': ['Main Block', 'New Block', 'Annexe'][i // 60 % 3]}
+
+# The only fields the original perform_training put in each record
+ORIGINAL_FIELDS = ('registration_number', 'roll_number', 'seat', 'room', 'building')
+
+def memory(size):
+    """
+    Per-student store of the original engine (a dict per seat record with just
+    ORIGINAL_FIELDS, referenced from token_map under both IDs, plus the
+    search_tokens list) against the columnar SeatIndex (token bytes, int row ids,
+    interned name codes, exact keys, and the student ids / masked names the
+    original never kept).
+    """
+    gc.collect()
+    tracemalloc.start()
+    search_tokens, token_map = [], {}
+    for row in student_rows(size):
+        s = {field: row[field] for field in ORIGINAL_FIELDS}
+        for key in ('registration_number', 'roll_number'):
+            token = str(s[key]).strip()
+            search_tokens.append(token)
+            token_map[token] = s
+    old_store = tracemalloc.get_traced_memory()[0]
+    del search_tokens, token_map
+    gc.collect()
+    tracemalloc.stop()
+
+    index, _ = SeatIndex.build(student_rows(size))
+    columns = [index.search_tokens, index.token_rows, index.student_ids,
+               index.exact_keys, index.exact_pos, index.digit_keys, index.digit_pos]
+    columns += list(index.codes.values()) + list(index.names.values()) + [index.masked_names]
+    new_store = sum(arr.nbytes for arr in columns)
+    matrices = sum(m.nbytes for m in (index.tfidf_matrix.data, index.tfidf_matrix.indices,
+                                      index.tfidf_matrix.indptr, index.post_indptr, index.post_rows))
+
+    mb = 1024 * 1024
+    print(f"{size:,} students | dict store {old_store / mb:7.1f} MB ({old_store / size:5.0f} B/student) | "
+          f"columnar store {new_store / mb:6.1f} MB ({new_store / size:4.0f} B/student) | "
+          f"reduction {old_store / new_store:4.1f}x | (+ n-gram matrices {matrices / mb:.1f} MB)")
+    return old_store / new_store
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='10000,100000,1000000')
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--stress', type=float, default=0, help='seconds of concurrent lookup/retrain stress')
+    parser.add_argument('--memory', type=int, default=0, help='students for the store memory comparison')
+    args = parser.parse_args()
+    if args.memory:
+        raise SystemExit(0 if memory(args.memory) >= 5 else 1)
+    if args.stress:
+        raise SystemExit(0 if stress(args.stress) else 1)
+    for size in [int(x) for x in args.sizes.split(',')]:
+        run(size, args.queries)
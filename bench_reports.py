@@ -0,0 +1,110 @@
+# bench_reports.py
+# Query count and latency of the per-exam reports (master chart, question
+# distribution, notice board) as the exam grows. Each is one grouped query,
+# so the statement count must not depend on the number of students; exits 1 if it does.
+# The second view of each report is served by the report cache.
+#
+#   python bench_reports.py                      -> 500, 5,000, 20,000 students
+#   python bench_reports.py --sizes 1000,50000
+#   python bench_reports.py --attendance 20000   -> attendance sheets: one JSON body vs NDJSON stream
+#   python bench_reports.py --export 20000       -> printable zip export: cold vs per-hall cache
+import argparse
+import time
+import tracemalloc
+
+from app import db
+from app.models import Exam
+from bench_seating import bench_app, count_queries, exam_body, populate
+
+REPORTS = ['/api/admin/master-chart', '/api/admin/question-distribution', '/api/admin/notice-board-data']
+
+def run(n_students, n_rooms):
+    """Statements and time per report for one exam of n_students."""
+    app = bench_app()
+    with app.app_context():
+        db.create_all()
+        populate(n_students, n_rooms)
+        client = app.test_client()
+        client.post('/api/admin/generate-seating', json=exam_body(0))
+        exam_id = Exam.query.one().id
+        counter = count_queries(db.engine)
+
+        results = {}
+        for url in REPORTS:
+            counter['n'] = 0
+            started = time.perf_counter()
+            client.get(f"{url}?exam_id={exam_id}")
+            results[url] = (counter['n'], time.perf_counter() - started)
+            started = time.perf_counter()
+            client.get(f"{url}?exam_id={exam_id}")
+            results[url] += (time.perf_counter() - started,)
+    print(f"{n_students:>7,} students | " + " | ".join(
+        f"{url.rsplit('/', 1)[1]} {n} queries {elapsed * 1000:6.1f} ms (cached {cached * 1000:4.1f} ms)"
+        for url, (n, elapsed, cached) in results.items()))
+    return {url: n for url, (n, _, _) in results.items()}
+
+def attendance(n_students, n_rooms):
+    """Time to first page and peak Python memory: whole JSON response vs stream=1."""
+    app = bench_app()
+    with app.app_context():
+        db.create_all()
+        populate(n_students, n_rooms)
+        client = app.test_client()
+        client.post('/api/admin/generate-seating', json=exam_body(0))
+        url = f"/api/admin/attendance-sheet-data?exam_id={Exam.query.one().id}"
+
+        for label, query in (('json', ''), ('ndjson', '&stream=1')):
+            tracemalloc.start()
+            started = time.perf_counter()
+            response = client.get(url + query, buffered=False)
+            first, pages = None, 0
+            for chunk in response.response:
+                if first is None: first = time.perf_counter() - started
+                pages += chunk.count(b'\n') if query else chunk.count(b'"hall_no"')
+            elapsed = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            response.close()
+            print(f"{n_students:>7,} students | {label:6} {pages:5} pages | first page {first * 1000:7.1f} ms | "
+                  f"total {elapsed * 1000:7.1f} ms | peak {peak / 1024 / 1024:6.1f} MB")
+
+def export(n_students, n_rooms):
+    """Full printable export (all reports, HTML): first run renders every hall, the second reads the cache.
+    Peak is Python memory in this process (the request side, not the render workers)."""
+    app = bench_app()
+    with app.app_context():
+        db.create_all()
+        populate(n_students, n_rooms)
+        client = app.test_client()
+        client.post('/api/admin/generate-seating', json=exam_body(0))
+        url = f"/api/admin/export?exam_id={Exam.query.one().id}"
+        for label in ('cold', 'cached'):
+            tracemalloc.start()
+            started = time.perf_counter()
+            response = client.get(url, buffered=False)
+            first, size = None, 0
+            for chunk in response.response:
+                if first is None: first = time.perf_counter() - started
+                size += len(chunk)
+            elapsed = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            response.close()
+            print(f"{n_students:>7,} students, {n_rooms} rooms | export {label:6} {elapsed * 1000:7.1f} ms "
+                  f"(first bytes {first * 1000:6.1f} ms) | zip {size / 1024:7.1f} KB | peak {peak / 1024 / 1024:6.1f} MB")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='500,5000,20000')
+    parser.add_argument('--rooms', type=int, default=300)
+    parser.add_argument('--attendance', type=int, default=0, help='students for the attendance streaming comparison')
+    parser.add_argument('--export', type=int, default=0, help='students for the zip export timing')
+    args = parser.parse_args()
+    if args.export:
+        raise SystemExit(export(args.export, args.rooms))
+    if args.attendance:
+        raise SystemExit(attendance(args.attendance, args.rooms))
+    counts = [run(int(n), args.rooms) for n in args.sizes.split(',')]
+    fixed = all(c == counts[0] for c in counts)
+    print("query count fixed across sizes" if fixed else "query count grows with exam size")
+    raise SystemExit(0 if fixed else 1)
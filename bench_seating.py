@@ -0,0 +1,103 @@
+# bench_seating.py
+# Times /api/admin/generate-seating end to end on a throwaway SQLite database.
+#
+#   python bench_seating.py                      -> 80 rooms, 5,000 students
+#   python bench_seating.py --rooms 120 --students 8000
+#   python bench_seating.py --timetable 12        -> 12 exams on 12 dates: one by one vs timetable mode
+import argparse
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import event
+
+from config import Config
+from app import create_app, db
+from app.models import Student, Room, SeatAssignment
+
+BRANCHES = ['CSE', 'ECE', 'ME', 'CE', 'EE', 'IT']
+
+def populate(n_students, n_rooms):
+    db.session.add_all([
+        Student(roll_number=f"{BRANCHES[i % len(BRANCHES)]}{i:06d}", registration_number=f"2303048{i:06d}",
+                name=f"Student {i}", email=f"s{i}@bench", branch=BRANCHES[i % len(BRANCHES)],
+                session='2023', password_hash='x')
+        for i in range(n_students)])
+    rows, cols = 10, 8
+    layout = ','.join('0' if k % 9 == 4 else '1' for k in range(rows * cols))
+    db.session.add_all([
+        Room(name=f"LH-{r:02d}", building='Main', total_rows=rows, total_columns=cols,
+             capacity=layout.count('1'), layout_matrix=layout)
+        for r in range(n_rooms)])
+    db.session.commit()
+
+def count_queries(engine):
+    counter = {'n': 0}
+    def before(*_): counter['n'] += 1
+    event.listen(engine, 'before_cursor_execute', before)
+    return counter
+
+def bench_app():
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{path}"
+        SEATING_VERSION_FILE = os.path.join(os.path.dirname(path), 'seating_version')
+        EXPORT_CACHE_DIR = os.path.join(os.path.dirname(path), 'export_cache')
+
+    return create_app(BenchConfig)
+
+def exam_body(n, max_branches=0):
+    return {'branches': 'ALL', 'target_session': '2023', 'date': str(date.today() + timedelta(days=n)),
+            'exam_name': f"Bench {n}", 'time': '10:00 AM', 'room_id': 'all', 'max_branches': max_branches}
+
+def main(n_students, n_rooms, max_branches):
+    app = bench_app()
+    with app.app_context():
+        db.create_all()
+        populate(n_students, n_rooms)
+        counter = count_queries(db.engine)
+        client = app.test_client()
+
+        started = time.perf_counter()
+        result = client.post('/api/admin/generate-seating', json=exam_body(0, max_branches)).get_json()
+        elapsed = time.perf_counter() - started
+
+        stored = SeatAssignment.query.count()
+    print(f"{n_rooms} rooms, {n_students:,} students | allocated {result.get('allocated')} "
+          f"(stored {stored}) in {elapsed * 1000:.0f} ms | {counter['n']} SQL statements | "
+          f"{len(result.get('rooms_used', []))} rooms used, {result.get('leftover_seats')} seats left empty")
+    return elapsed
+
+def timetable(n_exams, n_students, n_rooms):
+    """The same n exams (one per date), seated one request at a time and then as one timetable."""
+    app = bench_app()
+    with app.app_context():
+        db.create_all()
+        populate(n_students, n_rooms)
+        client = app.test_client()
+        exams = [exam_body(n) for n in range(n_exams)]
+
+        started = time.perf_counter()
+        for body in exams:
+            client.post('/api/admin/generate-seating', json=body)
+        serial = time.perf_counter() - started
+
+        started = time.perf_counter()
+        result = client.post('/api/admin/generate-seating/timetable', json={'exams': exams}).get_json()
+        batch = time.perf_counter() - started
+    print(f"{n_exams} exams x {n_students:,} students, {n_rooms} rooms | one by one {serial * 1000:.0f} ms "
+          f"({serial / n_exams * 1000:.0f} ms/exam) | timetable {batch * 1000:.0f} ms | allocated {result['allocated']:,}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--students', type=int, default=5000)
+    parser.add_argument('--rooms', type=int, default=80)
+    parser.add_argument('--max-branches', type=int, default=0)
+    parser.add_argument('--timetable', type=int, default=0, help='exams (one per date) for timetable mode')
+    args = parser.parse_args()
+    if args.timetable:
+        timetable(args.timetable, args.students, args.rooms)
+    else:
+        main(args.students, args.rooms, args.max_branches)
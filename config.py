@@ -10,4 +10,16 @@ class Config:
     
     # Path for storing profile pictures
     UPLOAD_FOLDER = os.path.join(os.getcwd(), 'app/static/profile_pics')
-    MAX_CONTENT_LENGTH = 2 * 1024 * 1024  # Limit uploads to 2MB (Security)
\ No newline at end of file
+    MAX_CONTENT_LENGTH = 2 * 1024 * 1024  # Limit uploads to 2MB (Security)
+
+    # Seat-lookup index snapshot, memory-mapped by every worker
+    AI_INDEX_DIR = os.environ.get('AI_INDEX_DIR') or os.path.join(os.getcwd(), 'instance', 'ai_index')
+
+    # Dry-run seating previews awaiting commit (see services/seating_preview.py)
+    SEATING_PREVIEW_DIR = os.environ.get('SEATING_PREVIEW_DIR') or os.path.join(os.getcwd(), 'instance', 'seating_previews')
+
+    # Rendered per-hall report files for /admin/export (see services/report_export.py)
+    EXPORT_CACHE_DIR = os.environ.get('EXPORT_CACHE_DIR') or os.path.join(os.getcwd(), 'instance', 'export_cache')
+
+    # Seating version shared by all workers: report caches key on it (see services/report_cache.py)
+    SEATING_VERSION_FILE = os.environ.get('SEATING_VERSION_FILE') or os.path.join(os.getcwd(), 'instance', 'seating_version')
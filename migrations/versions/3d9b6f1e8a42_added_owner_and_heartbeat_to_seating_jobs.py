@@ -0,0 +1,28 @@
+"""Added owner and heartbeat to seating jobs
+
+Revision ID: 3d9b6f1e8a42
+Revises: a61f2e9b7c34
+Create Date: 2026-10-17 10:42:37.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3d9b6f1e8a42'
+down_revision = 'a61f2e9b7c34'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('seating_jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('owner', sa.String(length=100), nullable=True))
+        batch_op.add_column(sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('seating_jobs', schema=None) as batch_op:
+        batch_op.drop_column('heartbeat_at')
+        batch_op.drop_column('owner')
@@ -0,0 +1,47 @@
+"""Added layout bitmap to rooms
+
+Revision ID: 4b7e2c91a5d3
+Revises: d23efc3d605d
+Create Date: 2026-10-16 10:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b7e2c91a5d3'
+down_revision = 'd23efc3d605d'
+branch_labels = None
+depends_on = None
+
+
+def pack_layout(rows, cols, layout_matrix):
+    # Same packing as seating_algo.compile_layout_bitmap (np.packbits, big-endian bits)
+    cells = [x.strip() != '0' for x in layout_matrix.split(',')][:rows * cols]
+    cells += [True] * (rows * cols - len(cells))
+    packed = bytearray((len(cells) + 7) // 8)
+    for i, bit in enumerate(cells):
+        if bit: packed[i // 8] |= 0x80 >> (i % 8)
+    return bytes(packed)
+
+
+def upgrade():
+    with op.batch_alter_table('rooms', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('layout_bitmap', sa.LargeBinary(), nullable=True))
+
+    # Backfill existing rooms
+    conn = op.get_bind()
+    rooms = sa.table('rooms', sa.column('id', sa.Integer), sa.column('total_rows', sa.Integer),
+                     sa.column('total_columns', sa.Integer), sa.column('layout_matrix', sa.Text),
+                     sa.column('layout_bitmap', sa.LargeBinary))
+    for room_id, rows, cols, matrix in conn.execute(
+            sa.select(rooms.c.id, rooms.c.total_rows, rooms.c.total_columns, rooms.c.layout_matrix)
+            .where(rooms.c.layout_matrix.isnot(None), rooms.c.layout_matrix != '')).all():
+        conn.execute(rooms.update().where(rooms.c.id == room_id)
+                     .values(layout_bitmap=pack_layout(rows, cols, matrix)))
+
+
+def downgrade():
+    with op.batch_alter_table('rooms', schema=None) as batch_op:
+        batch_op.drop_column('layout_bitmap')
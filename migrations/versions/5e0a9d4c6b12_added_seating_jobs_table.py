@@ -0,0 +1,39 @@
+"""Added seating jobs table
+
+Revision ID: 5e0a9d4c6b12
+Revises: 8c3f5a0d27e1
+Create Date: 2026-10-16 14:05:31.774120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e0a9d4c6b12'
+down_revision = '8c3f5a0d27e1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('seating_jobs',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('request_data', sa.Text(), nullable=False),
+    sa.Column('exam_id', sa.Integer(), nullable=True),
+    sa.Column('rooms_total', sa.Integer(), nullable=False),
+    sa.Column('rooms_done', sa.Integer(), nullable=False),
+    sa.Column('students_total', sa.Integer(), nullable=False),
+    sa.Column('students_seated', sa.Integer(), nullable=False),
+    sa.Column('message', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['exam_id'], ['exams.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('seating_jobs')
@@ -0,0 +1,46 @@
+"""Added sort key to students
+
+Revision ID: 8c3f5a0d27e1
+Revises: 4b7e2c91a5d3
+Create Date: 2026-10-16 11:47:03.562918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c3f5a0d27e1'
+down_revision = '4b7e2c91a5d3'
+branch_labels = None
+depends_on = None
+
+
+def sort_key(registration_number):
+    # Same as models.student_sort_key
+    digits = ''.join(filter(str.isdigit, str(registration_number or '')))
+    return min(int(digits), 2**63 - 1) if digits else 0
+
+
+def upgrade():
+    with op.batch_alter_table('students', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('sort_key', sa.BigInteger(), nullable=False, server_default='0'))
+
+    # Backfill existing students
+    conn = op.get_bind()
+    students = sa.table('students', sa.column('id', sa.Integer),
+                        sa.column('registration_number', sa.String), sa.column('sort_key', sa.BigInteger))
+    rows = conn.execute(sa.select(students.c.id, students.c.registration_number)).all()
+    if rows:
+        conn.execute(students.update().where(students.c.id == sa.bindparam('student_id'))
+                     .values(sort_key=sa.bindparam('key')),
+                     [{'student_id': sid, 'key': sort_key(reg)} for sid, reg in rows])
+
+    with op.batch_alter_table('students', schema=None) as batch_op:
+        batch_op.create_index('ix_students_session_branch_sort_key', ['session', 'branch', 'sort_key'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('students', schema=None) as batch_op:
+        batch_op.drop_index('ix_students_session_branch_sort_key')
+        batch_op.drop_column('sort_key')
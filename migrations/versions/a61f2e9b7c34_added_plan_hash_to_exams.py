@@ -0,0 +1,26 @@
+"""Added plan hash to exams
+
+Revision ID: a61f2e9b7c34
+Revises: 5e0a9d4c6b12
+Create Date: 2026-10-16 16:21:09.530817
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a61f2e9b7c34'
+down_revision = '5e0a9d4c6b12'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('exams', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('plan_hash', sa.String(length=40), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('exams', schema=None) as batch_op:
+        batch_op.drop_column('plan_hash')